@@ -1,9 +1,14 @@
+import json
 import logging
+import os
+import tempfile
 import threading
-import time
+from types import MappingProxyType
 from urllib.parse import urlparse
 
+import requests
 from bitcoinutils.keys import PublicKey
+from hexbytes import HexBytes
 from web3 import Web3
 
 from zbtc_utils import (
@@ -11,13 +16,27 @@ from zbtc_utils import (
     get_burned,
     get_deposit,
     get_withdraw_tx,
+    get_batch_withdraw_tx,
+    get_consolidation_tx,
+    classify_withdraw_deposits,
 )
+from merkle import MerkleTree, mint_leaf
 from pyfrost.network.abstract import Validators, DataManager, NodesInfo as BaseNodeInfo
-from config import VALIDATED_IPS, ZBTC_ADDRESS, MPC_ADDRESS, DepositType
-from typing import Dict
-
-import json
-import os
+from config import (
+    VALIDATED_IPS,
+    MPC_ADDRESS,
+    STORAGE_BACKEND,
+    SUBGRAPH_URL,
+    SUBGRAPH_TIMEOUT,
+    SUBGRAPH_PAGE_SIZE,
+    NODES_SNAPSHOT_FILE,
+    VALIDATION_CACHE_SIZE,
+    VALIDATION_CACHE_TTL,
+    DepositType,
+)
+from utils.cache import LRUCache
+from utils.storage import open_store
+from typing import Dict, Mapping
 
 
 class NodeDataManager(DataManager):
@@ -25,52 +44,36 @@ class NodeDataManager(DataManager):
         self,
         dkg_keys_file="./data/dkg_keys.json",
         nonces_file="./data/nonces.json",
+        backend=STORAGE_BACKEND,
     ) -> None:
         super().__init__()
         self.dkg_keys_file = dkg_keys_file
         self.nonces_file = nonces_file
 
-        # Load data from files if they exist
-        self.__dkg_keys = self._load_data(self.dkg_keys_file)
-        self.__nonces = self._load_data(self.nonces_file)
-
-    def _load_data(self, file_path):
-        if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                return json.load(file)
-        return {}
-
-    def _save_data(self, file_path, data):
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)
+        # Existing JSON files are imported into the store on first start
+        self.__dkg_keys = open_store(self.dkg_keys_file, backend)
+        self.__nonces = open_store(self.nonces_file, backend)
 
     def set_nonce(self, nonce_public: str, nonce_private: str) -> None:
-        self.__nonces[nonce_public] = nonce_private
-        self._save_data(self.nonces_file, self.__nonces)
+        self.__nonces.set(nonce_public, nonce_private)
 
     def get_nonce(self, nonce_public: str):
-        data = self._load_data(self.nonces_file)
-        return data.get(nonce_public)
+        return self.__nonces.get(nonce_public)
 
     def remove_nonce(self, nonce_public: str) -> None:
-        self.__nonces = self._load_data(self.nonces_file)
-        if nonce_public in self.__nonces:
-            del self.__nonces[nonce_public]
-            self._save_data(self.nonces_file, self.__nonces)
+        self.__nonces.remove(nonce_public)
 
     def set_key(self, key, value) -> None:
-        self.__dkg_keys[key] = value
-        self._save_data(self.dkg_keys_file, self.__dkg_keys)
+        self.__dkg_keys.set(key, value)
 
     def get_key(self, key):
-        data = self._load_data(self.dkg_keys_file)
-        return data.get(key, {})
+        return self.__dkg_keys.get(key, {})
 
     def remove_key(self, key):
-        self.__dkg_keys = self._load_data(self.dkg_keys_file)
-        if key in self.__dkg_keys:
-            del self.__dkg_keys[key]
-            self._save_data(self.dkg_keys_file, self.__dkg_keys)
+        self.__dkg_keys.remove(key)
+
+
+validation_cache = LRUCache(VALIDATION_CACHE_SIZE, ttl=VALIDATION_CACHE_TTL)
 
 
 class NodeValidators(Validators):
@@ -85,38 +88,56 @@ class NodeValidators(Validators):
 
     @staticmethod
     def data_validator(input_data: Dict):
+        # All inputs of one transaction arrive as requests that only differ in
+        # "hash", so the valid hashes of a payload are computed once and
+        # served from the cache for the remaining inputs.
         method = input_data["method"]
         data = input_data["data"]
+        cache_key = json.dumps(
+            {
+                "method": method,
+                "data": {key: value for key, value in data.items() if key != "hash"},
+            },
+            sort_keys=True,
+        )
+        valid_hashes = validation_cache.get_or_set(
+            cache_key, lambda: NodeValidators._valid_hashes(method, data)
+        )
+        logging.debug(f"Validation cache: {validation_cache.stats()}")
+
+        message_hash = data["hash"]
+        if method not in ("mint", "mint_batch"):
+            message_hash = bytes.fromhex(message_hash).hex()
+        if message_hash not in valid_hashes:
+            raise ValueError(f"Invalid Data: {input_data}")
+        return {
+            "input": input_data,
+            "sign_params": valid_hashes[message_hash],
+            "hash": message_hash,
+        }
+
+    @staticmethod
+    def _valid_hashes(method: str, data: Dict) -> Dict:
         if method == "get_simple_withdraw_tx":
             from_address = data["from"]
             to_address = data["to"]
             fee = data["fee"]
             utxos = data["utxos"]
-            tx_digest = bytes.fromhex(data["hash"])
             send_amount = data["send_amount"]
             tx, tx_digests = get_simple_withdraw_tx(
                 from_address, utxos, to_address, send_amount, fee
             )
-            if tx_digest in tx_digests:
-                result = {
-                    "input": input_data,
-                    "sign_params": {"tx_digest": tx_digest.hex()},
-                    "hash": tx_digest.hex(),
-                }
-                return result
-            else:
-                raise ValueError(f"Invalid Data: {input_data}")
+            return {
+                tx_digest.hex(): {"tx_digest": tx_digest.hex()}
+                for tx_digest in tx_digests
+            }
 
         elif method == "get_withdraw_tx":
-            rpc_url = "https://ethereum-holesky-rpc.publicnode.com"
-            web3 = Web3(Web3.HTTPProvider(rpc_url))
-
             burn_tx_hash = data["burn_tx_hash"]
-            tx_digest = bytes.fromhex(data["hash"])
             fee = data["fee"]
             utxos = data["utxos"]
 
-            burned = get_burned(burn_tx_hash, web3, ZBTC_ADDRESS)
+            burned = get_burned(burn_tx_hash)
             logging.debug(f"Burn Info: {burned}")
             send_amount = burned["amount"]
             single_spend_txid = burned["singleSpendTx"]
@@ -136,183 +157,337 @@ class NodeValidators(Validators):
                 single_spend_vout,
                 burner_address,
             )
-            if tx_digest in tx_digests:
-                result = {
-                    "input": input_data,
-                    "sign_params": {"tx_digest": tx_digest.hex()},
-                    "hash": tx_digest.hex(),
-                }
-                return result
-            else:
-                raise ValueError(f"Invalid Data: {input_data}")
+            return {
+                tx_digest.hex(): {"tx_digest": tx_digest.hex()}
+                for tx_digest in tx_digests
+            }
+
+        elif method == "get_batch_withdraw_tx":
+            burn_tx_hashes = data["burn_tx_hashes"]
+            fee = data["fee"]
+            utxos = data["utxos"]
+            assert len(set(burn_tx_hashes)) == len(
+                burn_tx_hashes
+            ), "Duplicate burn in batch"
+
+            burns = [get_burned(burn_tx_hash) for burn_tx_hash in burn_tx_hashes]
+            logging.debug(f"Burn Info: {burns}")
+            tx, tx_digests = get_batch_withdraw_tx(MPC_ADDRESS, utxos, burns, fee)
+            return {
+                tx_digest.hex(): {"tx_digest": tx_digest.hex()}
+                for tx_digest in tx_digests
+            }
+
+        elif method == "get_consolidation_tx":
+            # The fee is derived from the input count, so the only output is
+            # the wallet itself and nothing can be sent elsewhere
+            utxos = data["utxos"]
+            flags = classify_withdraw_deposits([utxo["txid"] for utxo in utxos])
+            assert not any(flags.values()), "Withdraw deposits cannot be consolidated"
+            tx, tx_digests = get_consolidation_tx(MPC_ADDRESS, utxos)
+            return {
+                tx_digest.hex(): {"tx_digest": tx_digest.hex()}
+                for tx_digest in tx_digests
+            }
 
         elif method == "mint":
-            tx_hash = data["tx"]
-            bitcoin_address = data["bitcoin_address"]
-            amount = data["amount"]
-            to = data["to"]
-            message_hash = data["hash"]
-
-            deposit = get_deposit(
-                tx_hash, bitcoin_address, MPC_ADDRESS, DepositType.BRIDGE
-            )
-            msg = Web3.solidity_keccak(
-                ["uint256", "uint256", "address"],
-                [
-                    int(deposit["tx"], 16),
-                    deposit["amount"],
-                    Web3.to_checksum_address(deposit["eth_address"]),
-                ],
-            ).hex()
-            if (
-                msg == message_hash
-                and int(tx_hash, 16) == int(deposit["tx"], 16)
-                and deposit["amount"] == amount
-                and to == Web3.to_checksum_address(deposit["eth_address"])
-            ):
-                result = {
-                    "input": input_data,
-                    "sign_params": {
-                        "tx": int(deposit["tx"], 16),
-                        "amount": deposit["amount"],
-                        "to": Web3.to_checksum_address(deposit["eth_address"]),
-                    },
-                    "hash": msg,
-                }
-                return result
-            else:
-                raise ValueError(f"Invalid Data: {input_data}")
+            mint = NodeValidators._mint_message(data)
+            return {mint[0]: mint[1]} if mint is not None else {}
+
+        elif method == "mint_batch":
+            # One signature over the Merkle root authorizes every mint in it
+            txs = [int(mint_data["tx"], 16) for mint_data in data["mints"]]
+            assert len(set(txs)) == len(txs), "Duplicate deposit in batch"
+            leaves = []
+            for mint_data in data["mints"]:
+                mint = NodeValidators._mint_message(mint_data)
+                if mint is None:
+                    return {}
+                leaves.append(mint_leaf(HexBytes(mint[0])))
+            root = "0x" + MerkleTree(leaves).root.hex()
+            return {root: {"root": root, "count": len(leaves)}}
 
         else:
             raise NotImplementedError()
 
+    @staticmethod
+    def _mint_message(data: Dict):
+        tx_hash = data["tx"]
+        bitcoin_address = data["bitcoin_address"]
+        amount = data["amount"]
+        to = data["to"]
+
+        deposit = get_deposit(tx_hash, bitcoin_address, MPC_ADDRESS, DepositType.BRIDGE)
+        msg = Web3.solidity_keccak(
+            ["uint256", "uint256", "address"],
+            [
+                int(deposit["tx"], 16),
+                deposit["amount"],
+                Web3.to_checksum_address(deposit["eth_address"]),
+            ],
+        ).hex()
+        if (
+            int(tx_hash, 16) == int(deposit["tx"], 16)
+            and deposit["amount"] == amount
+            and to == Web3.to_checksum_address(deposit["eth_address"])
+        ):
+            return msg, {
+                "tx": int(deposit["tx"], 16),
+                "amount": deposit["amount"],
+                "to": Web3.to_checksum_address(deposit["eth_address"]),
+            }
+        return None
+
+
+STATIC_OPERATORS = [
+    {
+        "id": 328770415483607537620835655248677510917372104546767211276878006445062912835143,
+        "operatorId": "0xfd17e3847a110c89925baf6daed35c6f1ddf8bc9c8b38a9bb41096535b5f97fd",
+        "pubkeyG1_X": "13136058664468634065216375495074052951238430846991157058743804374832267522753",
+        "pubkeyG1_Y": "11448663166422622690605895009604224092710018000821885173435009863555132846864",
+        "pubkeyG2_X": [
+            "10511559378400058845254311411570731849679292693017411812923774690860252808501",
+            "15620425198086360195633860348516614475072926775330350148765733898945732625720",
+        ],
+        "pubkeyG2_Y": [
+            "16017480246882045886082900913073979516950823832148982212683097568841948701108",
+            "14484632839742302641550896988066025133849822519077390584095458750594033151899",
+        ],
+        "socket": "http://127.0.0.1:6001",
+        "stake": "2974982461847618543",
+    },
+    {
+        "id": 366826606230888689541085718681786025668444134279884139140074940042583222575349,
+        "operatorId": "0x0d67cd10c7b7b113b067d42c84a40dee850474892d5647955fdcb7a108b642ed",
+        "pubkeyG1_X": "11399471800741056566877625555909729712376287795123904633138272159990180371807",
+        "pubkeyG1_Y": "10645553139467370838640057691282710801262607458640782135246892954426222314519",
+        "pubkeyG2_X": [
+            "8344850473033184686902482839436715877919563811752833276573923607099775865043",
+            "4287300409248618682415538776498257043987070039762239000711321122174379065112",
+        ],
+        "pubkeyG2_Y": [
+            "11807354621768019516854407377374237270594325804547558692677348859272579238961",
+            "20153654613358246757117843775082812593787681037043806947800580468943097651257",
+        ],
+        "socket": "http://127.0.0.1:6002",
+        "stake": "4776064595081970865",
+    },
+    {
+        "id": 324910018991026634260215376027343834221528157096062876921644580395908318623552,
+        "operatorId": "0xfe6ec3f9e9ad332de8fcdf8d630ccdc209d54e71fcd9cc866785cebe2db5197b",
+        "pubkeyG1_X": "16372471696281201100834877067300193172203705174007976156113229487517292180507",
+        "pubkeyG1_Y": "11195027664027499680857348217536701889329537780274329435496499469661205187126",
+        "pubkeyG2_X": [
+            "9129315811335480116895541563265372302966042939145012300375000784054906504662",
+            "8062867142918919339339326106766094266119169497663365068497830707296592726548",
+        ],
+        "pubkeyG2_Y": [
+            "7195420705070610085822336271177477197783222206049730346661288394390002326108",
+            "3843095263670262906968665217932572653461722681179190576442171778724113982749",
+        ],
+        "socket": "http://127.0.0.1:6003",
+        "stake": "1980028561960706956",
+    },
+    {
+        "id": 388172267086462125616873973700919348523043339018696303660100571160342164696419,
+        "operatorId": "0x3944d3035bcc914866777523827256cfb8cea660e432016cfc5f31c71d3edff1",
+        "pubkeyG1_X": "2107728905596792720263207598883501200301713353534115895072254842197409962090",
+        "pubkeyG1_Y": "8885092866510381984783787709758777165613856682655784435432364063498730570977",
+        "pubkeyG2_X": [
+            "18579596182924273925972577726738150048922941800743831539416930305484061936124",
+            "11078573884058873896260639338888752909345053591830996326194684213522477252975",
+        ],
+        "pubkeyG2_Y": [
+            "12815820260348750024509131099202316108391956812471978794258776298909273677956",
+            "4470851997511823466167593148008452052278478993200951997572975896620600296112",
+        ],
+        "socket": "http://127.0.0.1:6004",
+        "stake": "1036678674083155839644",
+    },
+    {
+        "id": 337440980244172592770442709787204468871664079923491991368721427786201124581700,
+        "operatorId": "0x579f7ab1902a30bae5542c835c00d78db52b153f466741fe04c8953e957a18a8",
+        "pubkeyG1_X": "14590362989264834695543631629361015631540784167586086184905965780954224754604",
+        "pubkeyG1_Y": "9365883818028778729400632369133871757956027117352364926519949663515964324573",
+        "pubkeyG2_X": [
+            "17841992338011959299830084698925465653222030673520058242737558022009449790245",
+            "17935590702077630769332531429621728906734851131249102999927123630243035111102",
+        ],
+        "pubkeyG2_Y": [
+            "15985009759716155838997669718798399097028266211518630688480960679184897016197",
+            "17129141937139424498171485392082139250320463326821287243331096121360058826182",
+        ],
+        "socket": "http://127.0.0.1:6005",
+        "stake": "1686037489182236898275",
+    },
+]
+
+
+META_QUERY = """
+query Meta {
+  _meta { block { number } }
+}
+"""
+
+OPERATORS_QUERY = """
+query ChangedOperators($block: Int!, $fromBlock: Int!, $first: Int!, $skip: Int!) {
+  operators(
+    block: {number: $block}
+    where: {_change_block: {number_gte: $fromBlock}}
+    orderBy: operatorId
+    first: $first
+    skip: $skip
+  ) {
+    id
+    operatorId
+    pubkeyG1_X
+    pubkeyG1_Y
+    pubkeyG2_X
+    pubkeyG2_Y
+    socket
+    stake
+    registered
+  }
+}
+"""
+
 
 class NodesInfo(BaseNodeInfo):
     prefix = "/pyfrost"
-    subgraph_url = (
-        "https://api.studio.thegraph.com/query/85556/bls_apk_registry/version/latest"
-    )
+    subgraph_url = SUBGRAPH_URL
+    snapshot_file = NODES_SNAPSHOT_FILE
 
     def __init__(self):
-        self.nodes = {}
+        # The table is never mutated in place, every sync swaps in a new dict
+        # so readers can keep using the snapshot they already hold.
+        self.nodes = MappingProxyType({})
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
         self._stop_event = threading.Event()
-        self.sync_with_subgraph()
-        self.start_sync_thread()
+        self._operators = {}
+        self._block = 0
+        # A process starts from the last known registry and catches up in the
+        # background; only a first start without snapshot waits for the sync.
+        loaded = self.subgraph_url is not None and self._load_snapshot()
+        if not loaded:
+            self.sync_with_subgraph()
+        self.start_sync_thread(immediate=loaded)
+
+    def snapshot(self) -> Mapping:
+        return self.nodes
+
+    def subscribe(self, callback) -> None:
+        with self._subscribers_lock:
+            self._subscribers.append(callback)
+
+    def _swap_nodes(self, nodes: Dict) -> None:
+        old_nodes = self.nodes
+        if nodes == old_nodes:
+            return
+        self.nodes = MappingProxyType(nodes)
+        logging.info(f"Node registry changed: {len(old_nodes)} -> {len(nodes)} nodes")
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(old_nodes, self.nodes)
+            except Exception as e:
+                logging.error(f"Node registry subscriber failed: {e}", exc_info=True)
 
     def sync_with_subgraph(self):
-        query = """
-        query MyQuery {
-          operators(where: {registered: true}) {
-            id
-            operatorId
-            pubkeyG1_X
-            pubkeyG1_Y
-            pubkeyG2_X
-            pubkeyG2_Y
-            socket
-            stake
-          }
-        }
-        """
-        self.nodes = self._convert_operators_to_nodes(
-            {
-                "data": {
-                    "operators": [
-                        {
-                            "id": 328770415483607537620835655248677510917372104546767211276878006445062912835143,
-                            "operatorId": "0xfd17e3847a110c89925baf6daed35c6f1ddf8bc9c8b38a9bb41096535b5f97fd",
-                            "pubkeyG1_X": "13136058664468634065216375495074052951238430846991157058743804374832267522753",
-                            "pubkeyG1_Y": "11448663166422622690605895009604224092710018000821885173435009863555132846864",
-                            "pubkeyG2_X": [
-                                "10511559378400058845254311411570731849679292693017411812923774690860252808501",
-                                "15620425198086360195633860348516614475072926775330350148765733898945732625720",
-                            ],
-                            "pubkeyG2_Y": [
-                                "16017480246882045886082900913073979516950823832148982212683097568841948701108",
-                                "14484632839742302641550896988066025133849822519077390584095458750594033151899",
-                            ],
-                            "socket": "http://127.0.0.1:6001",
-                            "stake": "2974982461847618543",
-                        },
-                        {
-                            "id": 366826606230888689541085718681786025668444134279884139140074940042583222575349,
-                            "operatorId": "0x0d67cd10c7b7b113b067d42c84a40dee850474892d5647955fdcb7a108b642ed",
-                            "pubkeyG1_X": "11399471800741056566877625555909729712376287795123904633138272159990180371807",
-                            "pubkeyG1_Y": "10645553139467370838640057691282710801262607458640782135246892954426222314519",
-                            "pubkeyG2_X": [
-                                "8344850473033184686902482839436715877919563811752833276573923607099775865043",
-                                "4287300409248618682415538776498257043987070039762239000711321122174379065112",
-                            ],
-                            "pubkeyG2_Y": [
-                                "11807354621768019516854407377374237270594325804547558692677348859272579238961",
-                                "20153654613358246757117843775082812593787681037043806947800580468943097651257",
-                            ],
-                            "socket": "http://127.0.0.1:6002",
-                            "stake": "4776064595081970865",
-                        },
-                        {
-                            "id": 324910018991026634260215376027343834221528157096062876921644580395908318623552,
-                            "operatorId": "0xfe6ec3f9e9ad332de8fcdf8d630ccdc209d54e71fcd9cc866785cebe2db5197b",
-                            "pubkeyG1_X": "16372471696281201100834877067300193172203705174007976156113229487517292180507",
-                            "pubkeyG1_Y": "11195027664027499680857348217536701889329537780274329435496499469661205187126",
-                            "pubkeyG2_X": [
-                                "9129315811335480116895541563265372302966042939145012300375000784054906504662",
-                                "8062867142918919339339326106766094266119169497663365068497830707296592726548",
-                            ],
-                            "pubkeyG2_Y": [
-                                "7195420705070610085822336271177477197783222206049730346661288394390002326108",
-                                "3843095263670262906968665217932572653461722681179190576442171778724113982749",
-                            ],
-                            "socket": "http://127.0.0.1:6003",
-                            "stake": "1980028561960706956",
-                        },
-                        {
-                            "id": 388172267086462125616873973700919348523043339018696303660100571160342164696419,
-                            "operatorId": "0x3944d3035bcc914866777523827256cfb8cea660e432016cfc5f31c71d3edff1",
-                            "pubkeyG1_X": "2107728905596792720263207598883501200301713353534115895072254842197409962090",
-                            "pubkeyG1_Y": "8885092866510381984783787709758777165613856682655784435432364063498730570977",
-                            "pubkeyG2_X": [
-                                "18579596182924273925972577726738150048922941800743831539416930305484061936124",
-                                "11078573884058873896260639338888752909345053591830996326194684213522477252975",
-                            ],
-                            "pubkeyG2_Y": [
-                                "12815820260348750024509131099202316108391956812471978794258776298909273677956",
-                                "4470851997511823466167593148008452052278478993200951997572975896620600296112",
-                            ],
-                            "socket": "http://127.0.0.1:6004",
-                            "stake": "1036678674083155839644",
-                        },
-                        {
-                            "id": 337440980244172592770442709787204468871664079923491991368721427786201124581700,
-                            "operatorId": "0x579f7ab1902a30bae5542c835c00d78db52b153f466741fe04c8953e957a18a8",
-                            "pubkeyG1_X": "14590362989264834695543631629361015631540784167586086184905965780954224754604",
-                            "pubkeyG1_Y": "9365883818028778729400632369133871757956027117352364926519949663515964324573",
-                            "pubkeyG2_X": [
-                                "17841992338011959299830084698925465653222030673520058242737558022009449790245",
-                                "17935590702077630769332531429621728906734851131249102999927123630243035111102",
-                            ],
-                            "pubkeyG2_Y": [
-                                "15985009759716155838997669718798399097028266211518630688480960679184897016197",
-                                "17129141937139424498171485392082139250320463326821287243331096121360058826182",
-                            ],
-                            "socket": "http://127.0.0.1:6005",
-                            "stake": "1686037489182236898275",
-                        },
-                    ]
-                }
-            }.get("data", {}).get("operators", [])
+        if self.subgraph_url is None:
+            self._swap_nodes(self._convert_operators_to_nodes(STATIC_OPERATORS))
+            return
+        try:
+            head_block, changed = self._fetch_changed_operators(self._block)
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            logging.error(f"Failed to sync with subgraph: {e}")
+            return
+        operators = dict(self._operators)
+        for operator in changed:
+            if operator.get("registered", True):
+                operators[operator["operatorId"]] = operator
+            else:
+                operators.pop(operator["operatorId"], None)
+        self._operators = operators
+        self._block = head_block
+        self._swap_nodes(self._convert_operators_to_nodes(operators.values()))
+        self._save_snapshot()
+        logging.debug(
+            f"Synced {len(changed)} changed operators with subgraph up to block {head_block}"
+        )
+
+    def _query_subgraph(self, query: str, variables: Dict) -> Dict:
+        response = requests.post(
+            self.subgraph_url,
+            json={"query": query, "variables": variables},
+            timeout=SUBGRAPH_TIMEOUT,
+        )
+        response.raise_for_status()
+        result = response.json()
+        if "errors" in result:
+            raise ValueError(f"Subgraph query failed: {result['errors']}")
+        return result["data"]
+
+    def _fetch_changed_operators(self, from_block: int):
+        # All pages are read at the same block so the result is consistent.
+        # The last seen block is fetched again on the next sync, which is
+        # harmless because changes are applied by operator id.
+        head_block = self._query_subgraph(META_QUERY, {})["_meta"]["block"]["number"]
+        changed = []
+        while True:
+            page = self._query_subgraph(
+                OPERATORS_QUERY,
+                {
+                    "block": head_block,
+                    "fromBlock": from_block,
+                    "first": SUBGRAPH_PAGE_SIZE,
+                    "skip": len(changed),
+                },
+            )["operators"]
+            changed += page
+            if len(page) < SUBGRAPH_PAGE_SIZE:
+                return head_block, changed
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.snapshot_file):
+            return False
+        try:
+            with open(self.snapshot_file, "r") as file:
+                snapshot = json.load(file)
+        except ValueError as e:
+            logging.error(f"Ignoring corrupted operator snapshot: {e}")
+            return False
+        self._block = snapshot["block"]
+        self._operators = snapshot["operators"]
+        self._swap_nodes(self._convert_operators_to_nodes(self._operators.values()))
+        logging.info(
+            f"Loaded {len(self._operators)} operators from snapshot at block {self._block}"
         )
-        # try:
-        #     response = requests.post(self.subgraph_url, json={'query': query})
-        #     if response.status_code == 200:
-        #         data = response.json()
-        #         operators = data.get('data', {}).get('operators', [])
-        #         self.nodes = self._convert_operators_to_nodes(operators)
-        #         print("Synced with subgraph successfully.")
-        #     else:
-        #         print(f"Failed to fetch data from subgraph. Status code: {response.status_code}")
-        # except requests.exceptions.RequestException as e:
-        #     print(f"An error occurred: {e}")
+        return True
+
+    def _save_snapshot(self) -> None:
+        # Nodes, the SA and dkg.py share the snapshot, so every writer uses
+        # its own temporary file. A failed save only costs the snapshot.
+        directory = os.path.dirname(self.snapshot_file) or "."
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory, prefix=f"{os.path.basename(self.snapshot_file)}."
+            )
+            with os.fdopen(fd, "w") as file:
+                json.dump({"block": self._block, "operators": self._operators}, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.snapshot_file)
+        except OSError as e:
+            logging.error(f"Failed to save operator snapshot: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
 
     def _convert_operators_to_nodes(self, operators):
         nodes = {}
@@ -332,15 +507,16 @@ class NodesInfo(BaseNodeInfo):
             nodes[str(int(operator["operatorId"], 16))] = node_info
         return nodes
 
-    def _sync_periodically(self, interval):
-        while not self._stop_event.is_set():
+    def _sync_periodically(self, interval, immediate):
+        if immediate:
+            self.sync_with_subgraph()
+        while not self._stop_event.wait(interval):
             self.sync_with_subgraph()
-            time.sleep(interval)
 
-    def start_sync_thread(self):
+    def start_sync_thread(self, immediate=False):
         sync_interval = 60  # 1 minute
         self._sync_thread = threading.Thread(
-            target=self._sync_periodically, args=(sync_interval,)
+            target=self._sync_periodically, args=(sync_interval, immediate)
         )
         self._sync_thread.daemon = True
         self._sync_thread.start()
@@ -353,6 +529,21 @@ class NodesInfo(BaseNodeInfo):
         return self.nodes.get(node_id, {})
 
     def get_all_nodes(self, n: int = None):
+        nodes = self.nodes
         if n is None:
-            n = len(self.nodes)
-        return list(self.nodes.keys())[:n]
+            n = len(nodes)
+        return list(nodes.keys())[:n]
+
+
+_nodes_info = None
+_nodes_info_lock = threading.Lock()
+
+
+def get_nodes_info() -> NodesInfo:
+    # Process-wide registry: one node table and one sync thread shared by the
+    # SA, DKG and node processes instead of one per caller.
+    global _nodes_info
+    with _nodes_info_lock:
+        if _nodes_info is None:
+            _nodes_info = NodesInfo()
+        return _nodes_info
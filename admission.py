@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from config import ADMISSION_QUEUE_TIMEOUT
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+class AdmissionLimit:
+    # At most `limit` requests of one endpoint run at once, up to
+    # `queue_size` more wait in arrival order for at most `queue_timeout`.
+    # Other requests are rejected right away, as are all of them while
+    # `ready()` is false (e.g. the signers have no nonces left), so a burst
+    # is turned away early instead of timing out together. Used from the
+    # Flask threads with admit() and from the event loop with admit_async(),
+    # where waiting requests do not hold a thread.
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        queue_size: int,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        ready=None,
+    ) -> None:
+        assert limit > 0, "admission limit must be positive"
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.ready = ready
+        self._lock = threading.Lock()
+        self._active = 0
+        # Wake-up callbacks of the waiting requests; a released slot is
+        # handed to the first one directly
+        self._waiters = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        return AdmissionRejected(f"{self.name}: {reason}")
+
+    def _try_enter(self, wake):
+        # Returns True if admitted, None if `wake` was queued
+        if self.ready is not None and not self.ready():
+            raise self._reject("no nonces available for the signers")
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            raise self._reject(f"{self._active} running, {len(self._waiters)} queued")
+        self._waiters.append(wake)
+        self.queued += 1
+        return None
+
+    def _leave_queue(self, wake) -> bool:
+        # False if the slot was handed over before the waiter gave up
+        with self._lock:
+            if wake not in self._waiters:
+                return False
+            self._waiters.remove(wake)
+            return True
+
+    def acquire(self) -> None:
+        event = threading.Event()
+        with self._lock:
+            if self._try_enter(event.set):
+                return
+        if not event.wait(self.queue_timeout) and self._leave_queue(event.set):
+            with self._lock:
+                raise self._reject(f"no slot within {self.queue_timeout}s")
+        with self._lock:
+            self.admitted += 1
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        handed_over = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(
+                lambda: handed_over.done() or handed_over.set_result(True)
+            )
+
+        with self._lock:
+            if self._try_enter(wake):
+                return
+        try:
+            await asyncio.wait_for(asyncio.shield(handed_over), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if self._leave_queue(wake):
+                with self._lock:
+                    raise self._reject(f"no slot within {self.queue_timeout}s")
+        except BaseException:
+            # Cancelled requests give a slot they were handed to the next one
+            if not self._leave_queue(wake):
+                self.release()
+            raise
+        with self._lock:
+            self.admitted += 1
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft()()
+            else:
+                self._active -= 1
+
+    @contextmanager
+    def admit(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def admit_async(self):
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "running": self._active,
+                "waiting": len(self._waiters),
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+            }
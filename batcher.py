@@ -0,0 +1,75 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class Batcher:
+    # Collects requests for up to `window` seconds after the first one arrives
+    # (or until `max_size` are pending) and serves them together through
+    # `sign_batch(items)`, which returns one result per item. If a
+    # batch fails, its items are retried one by one so a single bad request
+    # does not fail the others.
+    def __init__(self, sign_batch, window: float, max_size: int) -> None:
+        self.sign_batch = sign_batch
+        self.window = window
+        self.max_size = max_size
+        self._pending = queue.Queue()
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+
+    def add(self, item) -> Future:
+        future = Future()
+        self._pending.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_batch(self, batch) -> None:
+        try:
+            results = self.sign_batch([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            logging.error(
+                f"Batch of {len(batch)} requests failed ({e}), retrying one by one"
+            )
+            self.fallbacks += 1
+            for item in batch:
+                self._flush_batch([item])
+            return
+        self.batches += 1
+        self.batched_items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self) -> None:
+        while True:
+            self._flush_batch(self._collect())
+
+    def start_batcher_thread(self) -> None:
+        self._batcher_thread = threading.Thread(target=self._run)
+        self._batcher_thread.daemon = True
+        self._batcher_thread.start()
+
+    def metrics(self):
+        return {
+            "pending": self._pending.qsize(),
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "fallbacks": self.fallbacks,
+        }
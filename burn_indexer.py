@@ -0,0 +1,146 @@
+import logging
+import queue
+import threading
+
+from web3 import Web3
+
+from config import (
+    BURN_INDEXER_INTERVAL,
+    BURN_INDEXER_RANGE,
+    BURN_INDEXER_REORG_DEPTH,
+    BURN_INDEXER_START_BLOCK,
+    EVM_CONFIRMATIONS,
+)
+from evm_client import EvmClient
+from utils.storage import KeyValueStore
+
+
+class BurnIndexer:
+    # Streams Burned events of the ZBTC contract with ranged eth_getLogs and
+    # feeds them into a withdrawal queue. The cursor (last indexed block and
+    # its hash) and the set of seen burns are persisted, so a restart resumes
+    # where it stopped and never queues a burn twice.
+    def __init__(
+        self,
+        client: EvmClient,
+        store: KeyValueStore,
+        withdrawal_queue: queue.Queue = None,
+        start_block: int = BURN_INDEXER_START_BLOCK,
+        block_range: int = BURN_INDEXER_RANGE,
+        confirmations: int = EVM_CONFIRMATIONS,
+        reorg_depth: int = BURN_INDEXER_REORG_DEPTH,
+    ) -> None:
+        self.client = client
+        self.store = store
+        self.withdrawal_queue = (
+            withdrawal_queue if withdrawal_queue is not None else queue.Queue()
+        )
+        self.block_range = block_range
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self.cursor = store.get("cursor", {"block": start_block - 1, "hash": None})
+        self._stop_event = threading.Event()
+        # Burns queued before a restart but never processed are queued again
+        for key, entry in store.items():
+            if key.startswith("burn:") and not entry["processed"]:
+                self.withdrawal_queue.put(
+                    {"tx_hash": key[len("burn:") :], "burned": entry["burned"]}
+                )
+
+    def _check_reorg(self) -> None:
+        if self.cursor["hash"] is None:
+            return
+        block_hash = self.client.get_block_hash(self.cursor["block"])
+        if block_hash == self.cursor["hash"]:
+            return
+        # Blocks after the rewound cursor are scanned again, burns that were
+        # already queued are skipped by their tx hash.
+        rewound = max(self.cursor["block"] - self.reorg_depth, 0)
+        logging.warning(
+            f"Reorg detected at block {self.cursor['block']}, rewinding to {rewound}"
+        )
+        self.cursor = {"block": rewound, "hash": self.client.get_block_hash(rewound)}
+        self.store.set("cursor", self.cursor)
+
+    def _handle_logs(self, logs) -> int:
+        queued = 0
+        for log in logs:
+            if log.get("removed"):
+                continue
+            tx_hash = Web3.to_hex(log["transactionHash"])
+            key = f"burn:{tx_hash}"
+            if key in self.store:
+                continue
+            try:
+                burned = self.client.decode_burned(log)
+            except Exception as e:
+                logging.error(f"Cannot decode Burned log in {tx_hash}: {e}")
+                continue
+            self.store.set(
+                key,
+                {"block": log["blockNumber"], "burned": burned, "processed": False},
+            )
+            self.withdrawal_queue.put({"tx_hash": tx_hash, "burned": burned})
+            queued += 1
+        return queued
+
+    def poll(self) -> int:
+        self._check_reorg()
+        safe_head = self.client.get_block_number() - self.confirmations + 1
+        queued = 0
+        while self.cursor["block"] < safe_head and not self._stop_event.is_set():
+            from_block = self.cursor["block"] + 1
+            to_block = min(from_block + self.block_range - 1, safe_head)
+            try:
+                logs = self.client.get_burned_logs(from_block, to_block)
+            except Exception as e:
+                if self.block_range == 1:
+                    raise
+                # Providers cap the size of a getLogs response
+                self.block_range = max(self.block_range // 2, 1)
+                logging.warning(
+                    f"eth_getLogs {from_block}-{to_block} failed ({e}), "
+                    f"range reduced to {self.block_range}"
+                )
+                continue
+            queued += self._handle_logs(logs)
+            self.cursor = {
+                "block": to_block,
+                "hash": self.client.get_block_hash(to_block),
+            }
+            self.store.set("cursor", self.cursor)
+        if queued:
+            logging.info(f"Queued {queued} burns up to block {self.cursor['block']}")
+        return queued
+
+    def mark_processed(self, tx_hash: str) -> None:
+        key = f"burn:{tx_hash}"
+        entry = self.store.get(key)
+        if entry is not None:
+            self.store.set(key, {**entry, "processed": True})
+
+    def _poll_periodically(self, interval) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logging.error(f"Burn indexer poll failed: {e}", exc_info=True)
+            self._stop_event.wait(interval)
+
+    def start_indexer_thread(self, interval: float = BURN_INDEXER_INTERVAL) -> None:
+        self._indexer_thread = threading.Thread(
+            target=self._poll_periodically, args=(interval,)
+        )
+        self._indexer_thread.daemon = True
+        self._indexer_thread.start()
+
+    def stop_indexer_thread(self) -> None:
+        self._stop_event.set()
+        self._indexer_thread.join()
+
+    def metrics(self):
+        return {
+            "cursor": self.cursor["block"],
+            "queued": self.withdrawal_queue.qsize(),
+            "block_range": self.block_range,
+        }
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    BASE_URL,
+    MEMPOOL_BACKOFF,
+    MEMPOOL_CONCURRENCY,
+    MEMPOOL_POOL_SIZE,
+    MEMPOOL_RETRIES,
+    MEMPOOL_TIMEOUT,
+    TX_CACHE_BACKEND,
+    TX_CACHE_FILE,
+    TX_CACHE_SIZE,
+    TX_CACHE_UNCONFIRMED_TTL,
+)
+from utils.cache import LRUCache
+from utils.storage import KeyValueStore, open_store
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TransactionCache:
+    # Confirmed transactions never change and are kept until evicted, and in
+    # the optional on-disk tier forever. Unconfirmed ones expire quickly so a
+    # new confirmation is picked up.
+    def __init__(
+        self,
+        maxsize: int = TX_CACHE_SIZE,
+        unconfirmed_ttl: float = TX_CACHE_UNCONFIRMED_TTL,
+        store: KeyValueStore = None,
+    ) -> None:
+        self.memory = LRUCache(maxsize)
+        self.unconfirmed_ttl = unconfirmed_ttl
+        self.store = store
+
+    def get(self, txid: str):
+        tx = self.memory.get(txid)
+        if tx is None and self.store is not None:
+            tx = self.store.get(txid)
+            if tx is not None:
+                self.memory.set(txid, tx, ttl=None)
+        return tx
+
+    def put(self, tx: Dict) -> None:
+        if not tx.get("status", {}).get("confirmed"):
+            self.memory.set(tx["txid"], tx, ttl=self.unconfirmed_ttl)
+            return
+        self.memory.set(tx["txid"], tx, ttl=None)
+        if self.store is not None and tx["txid"] not in self.store:
+            self.store.set(tx["txid"], tx)
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["stored"] = len(self.store) if self.store is not None else None
+        return stats
+
+
+class MempoolClient:
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        pool_size: int = MEMPOOL_POOL_SIZE,
+        concurrency: int = MEMPOOL_CONCURRENCY,
+        retries: int = MEMPOOL_RETRIES,
+        backoff: float = MEMPOOL_BACKOFF,
+        timeout: float = MEMPOOL_TIMEOUT,
+        tx_cache: TransactionCache = None,
+    ) -> None:
+        self.base_url = base_url
+        self.tx_cache = tx_cache
+        self.pool_size = pool_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # Only idempotent GETs are retried, a broadcast is sent once
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        # aiohttp sessions are bound to the event loop they were created in
+        self._async_sessions = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def get_json(self, path: str):
+        response = self.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def get_tx(self, txid: str) -> Dict:
+        tx = self.tx_cache.get(txid) if self.tx_cache is not None else None
+        if tx is None:
+            tx = self.get_json(f"/tx/{txid}")
+            if self.tx_cache is not None:
+                self.tx_cache.put(tx)
+        return tx
+
+    def get_txs(self, txids: List[str]) -> List[Dict]:
+        return list(self._executor.map(self.get_tx, txids))
+
+    def get_address_utxos(self, address: str) -> List[Dict]:
+        return self.get_json(f"/address/{address}/utxo")
+
+    def get_address_txs(self, address: str, last_seen_txid: str = None) -> List[Dict]:
+        # Without last_seen_txid: mempool transactions and the newest confirmed
+        # ones, otherwise the confirmed transactions older than last_seen_txid
+        if last_seen_txid is None:
+            return self.get_json(f"/address/{address}/txs")
+        return self.get_json(f"/address/{address}/txs/chain/{last_seen_txid}")
+
+    def get_tip_height(self) -> int:
+        return self.get_json("/blocks/tip/height")
+
+    def broadcast_tx(self, raw_tx: str) -> requests.Response:
+        return self.session.post(
+            f"{self.base_url}/tx",
+            data=raw_tx,
+            headers={"Content-Type": "text/plain"},
+            timeout=self.timeout,
+        )
+
+    def _async_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._async_sessions[loop] = session
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return session
+
+    async def get_json_async(self, path: str):
+        session = self._async_session()
+        semaphore = self._semaphores[asyncio.get_running_loop()]
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore, session.get(f"{self.base_url}{path}") as response:
+                    if response.status in RETRY_STATUSES:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info,
+                            response.history,
+                            status=response.status,
+                        )
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries or (
+                    isinstance(e, aiohttp.ClientResponseError)
+                    and e.status not in RETRY_STATUSES
+                ):
+                    raise
+                delay = self.backoff * 2**attempt
+                logging.debug(f"Retrying {path} in {delay}s after error: {e}")
+                await asyncio.sleep(delay)
+
+    async def get_tx_async(self, txid: str) -> Dict:
+        tx = self.tx_cache.get(txid) if self.tx_cache is not None else None
+        if tx is None:
+            tx = await self.get_json_async(f"/tx/{txid}")
+            if self.tx_cache is not None:
+                self.tx_cache.put(tx)
+        return tx
+
+    async def get_txs_async(self, txids: List[str]) -> List[Dict]:
+        return await asyncio.gather(*[self.get_tx_async(txid) for txid in txids])
+
+    async def get_address_utxos_async(self, address: str) -> List[Dict]:
+        return await self.get_json_async(f"/address/{address}/utxo")
+
+    async def broadcast_tx_async(self, raw_tx: str) -> str:
+        session = self._async_session()
+        async with session.post(
+            f"{self.base_url}/tx",
+            data=raw_tx,
+            headers={"Content-Type": "text/plain"},
+        ) as response:
+            return await response.text()
+
+    async def close_async(self) -> None:
+        session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+tx_cache = TransactionCache(
+    store=open_store(TX_CACHE_FILE, TX_CACHE_BACKEND) if TX_CACHE_FILE else None
+)
+mempool_client = MempoolClient(tx_cache=tx_cache)
@@ -0,0 +1,129 @@
+from typing import Dict, List
+
+from config import COIN_SELECTION_INPUT_COST, COIN_SELECTION_MAX_TRIES, DUST_LIMIT
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def _waste(selected_count: int, excess: int, input_cost: int) -> int:
+    # Every input costs one FROST signing round plus its vbytes, the excess
+    # of a changeless selection is given up as fee
+    return selected_count * input_cost + excess
+
+
+def branch_and_bound(
+    utxos: List[Dict],
+    target: int,
+    input_cost: int = COIN_SELECTION_INPUT_COST,
+    change_window: int = DUST_LIMIT,
+    max_tries: int = COIN_SELECTION_MAX_TRIES,
+    max_inputs: int = None,
+):
+    # Depth-first search over include/exclude decisions of the coins sorted
+    # by value, for a selection in [target, target + change_window) of at most
+    # max_inputs coins that needs no change output. Returns the one with the
+    # least waste, or None.
+    coins = sorted(utxos, key=lambda utxo: utxo["value"], reverse=True)
+    values = [coin["value"] for coin in coins]
+    remaining = [0] * (len(values) + 1)
+    for i in range(len(values) - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + values[i]
+    if remaining[0] < target:
+        return None
+
+    best = None
+    best_waste = None
+    selected = []
+    total = 0
+    index = 0
+    tries = 0
+    while tries < max_tries:
+        tries += 1
+        backtrack = False
+        if total + remaining[index] < target or total >= target + change_window:
+            backtrack = True
+        elif best_waste is not None and len(selected) * input_cost >= best_waste:
+            backtrack = True
+        elif total < target and len(selected) == max_inputs:
+            backtrack = True
+        elif total >= target:
+            waste = _waste(len(selected), total - target, input_cost)
+            if best_waste is None or waste < best_waste:
+                best, best_waste = list(selected), waste
+            backtrack = True
+
+        if backtrack:
+            # Undo the last inclusion and try the branch without it
+            if not selected:
+                break
+            index = selected.pop()
+            total -= values[index]
+            index += 1
+            # Coins of equal value as the excluded one lead to the same sums
+            while index < len(values) and values[index] == values[index - 1]:
+                index += 1
+            continue
+
+        selected.append(index)
+        total += values[index]
+        index += 1
+
+    if best is None:
+        return None
+    return [coins[i] for i in best]
+
+
+def largest_first(utxos: List[Dict], target: int) -> List[Dict]:
+    # Largest coins first give the fewest inputs; the last one is then
+    # swapped for the smallest coin that still reaches the target, which
+    # keeps large coins for later withdrawals and shrinks the change.
+    coins = sorted(utxos, key=lambda utxo: utxo["value"], reverse=True)
+    selected = []
+    total = 0
+    for coin in coins:
+        if total >= target:
+            break
+        selected.append(coin)
+        total += coin["value"]
+    if total < target:
+        raise InsufficientFunds(f"{total} of {target} sats available")
+
+    last = selected.pop()
+    total -= last["value"]
+    # The coins that still reach the target are a prefix of the unused ones,
+    # the smallest of them is found by bisection
+    low, high = len(selected), len(coins) - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if total + coins[middle]["value"] >= target:
+            low = middle
+        else:
+            high = middle - 1
+    selected.append(coins[low])
+    return selected
+
+
+def select_coins(
+    utxos: List[Dict],
+    target: int,
+    input_cost: int = COIN_SELECTION_INPUT_COST,
+    change_window: int = DUST_LIMIT,
+) -> List[Dict]:
+    # Sorted once here, the sorts in the selectors are then linear
+    coins = sorted(utxos, key=lambda utxo: utxo["value"], reverse=True)
+    fallback = largest_first(coins, target)
+    if sum(coin["value"] for coin in fallback) - target < change_window:
+        return fallback
+    # Signing rounds dominate the cost, so a changeless selection is only
+    # taken when it needs no more inputs than the fallback
+    changeless = branch_and_bound(
+        coins,
+        target,
+        input_cost,
+        change_window,
+        COIN_SELECTION_MAX_TRIES,
+        max_inputs=len(fallback),
+    )
+    return changeless if changeless is not None else fallback
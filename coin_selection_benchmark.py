@@ -0,0 +1,71 @@
+import random
+import sys
+import time
+
+from coin_selection import branch_and_bound, largest_first, select_coins
+from config import COIN_SELECTION_INPUT_COST, DUST_LIMIT
+
+
+def first_fit(utxos, target):
+    # The selection get_utxos made before coin_selection: API order, first fit
+    selected = []
+    total = 0
+    for utxo in utxos:
+        if total >= target:
+            break
+        selected.append(utxo)
+        total += utxo["value"]
+    return selected
+
+
+def synthetic_utxos(count, dust_share, rng):
+    # Log-normal deposit sizes around 0.001 BTC plus a share of small coins
+    utxos = []
+    for i in range(count):
+        if rng.random() < dust_share:
+            value = rng.randint(DUST_LIMIT, 5000)
+        else:
+            value = max(int(rng.lognormvariate(11.5, 1.5)), DUST_LIMIT)
+        utxos.append({"txid": f"{i:064x}", "vout": 0, "value": value})
+    return utxos
+
+
+def run(name, select, utxos, targets):
+    inputs = 0
+    changeless = 0
+    started = time.perf_counter()
+    for target in targets:
+        selected = select(utxos, target)
+        inputs += len(selected)
+        if sum(utxo["value"] for utxo in selected) - target < DUST_LIMIT:
+            changeless += 1
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {name:<15} avg inputs {inputs / len(targets):7.2f}  "
+        f"changeless {changeless / len(targets):6.1%}  "
+        f"{elapsed / len(targets) * 1000:8.2f} ms/selection"
+    )
+
+
+def bnb_or_largest_first(utxos, target):
+    selected = branch_and_bound(utxos, target, COIN_SELECTION_INPUT_COST)
+    return selected if selected is not None else largest_first(utxos, target)
+
+
+if __name__ == "__main__":
+    # python coin_selection_benchmark.py [coins ...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    rng = random.Random(42)
+    for size in sizes:
+        for dust_share in (0.1, 0.5):
+            utxos = synthetic_utxos(size, dust_share, rng)
+            rng.shuffle(utxos)
+            # Small targets are served by one coin, large ones need several
+            targets = [rng.randint(10000, 5000000) for _ in range(50)] + [
+                rng.randint(5000000, 50000000) for _ in range(50)
+            ]
+            print(f"{size} coins, {dust_share:.0%} small coins, 100 targets")
+            run("first fit", first_fit, utxos, targets)
+            run("largest first", largest_first, utxos, targets)
+            run("bnb", bnb_or_largest_first, utxos, targets)
+            run("select_coins", select_coins, utxos, targets)
@@ -22,13 +22,159 @@ PRIVATE_KEYS = [
 PRIVATE_KEY = PRIVATE_KEYS[0]
 
 ZBTC_ADDRESS = "0x0323C15f879C8c8F024154BF5179c75e2eb9cAaD"
+
+# EVM RPC client; receipts are cached once they have EVM_CONFIRMATIONS
+EVM_RPC_URL = "https://ethereum-holesky-rpc.publicnode.com"
+EVM_CONFIRMATIONS = 12
+EVM_POOL_SIZE = 16
+EVM_RECEIPT_CACHE_SIZE = 10000
+
+# Burned event indexer feeding withdrawals to the SA without a /burn request.
+# Set the start block to the ZBTC contract deployment block.
+BURN_INDEXER_ENABLED = False
+BURN_INDEXER_FILE = "./data/burn_indexer.json"
+BURN_INDEXER_START_BLOCK = 0
+BURN_INDEXER_RANGE = 2000  # blocks per eth_getLogs call
+BURN_INDEXER_INTERVAL = 12  # seconds
+BURN_INDEXER_REORG_DEPTH = 64  # blocks rescanned when a reorg is detected
 FEE_AMOUNT = to_satoshis(0.00003000)
 
+# Change below the dust limit is left to the fee instead of creating an output
+DUST_LIMIT = 330
+# Coin selection weighs every input with the cost of its signing round
+COIN_SELECTION_INPUT_COST = to_satoshis(0.00002000)
+COIN_SELECTION_MAX_TRIES = 100000
+
 BTC_NETWORK = "testnet"
 BASE_URL = "https://mempool.space/testnet4/api"
 
+# mempool.space client
+MEMPOOL_POOL_SIZE = 16
+MEMPOOL_CONCURRENCY = 8
+MEMPOOL_RETRIES = 3
+MEMPOOL_BACKOFF = 0.5  # seconds, doubled on every retry
+MEMPOOL_TIMEOUT = 10  # seconds
+
+# Transaction cache. TX_CACHE_FILE enables an on-disk tier for confirmed
+# transactions; use the sqlite backend when several processes share it.
+TX_CACHE_SIZE = 10000
+TX_CACHE_UNCONFIRMED_TTL = 10  # seconds
+TX_CACHE_FILE = None
+TX_CACHE_BACKEND = "sqlite"
+
+# Deposit watcher: pre-signs mint authorizations once a bridge deposit to
+# MPC_ADDRESS has DEPOSIT_CONFIRMATIONS confirmations
+DEPOSIT_WATCHER_ENABLED = False
+DEPOSIT_WATCHER_FILE = "./data/deposit_watcher.json"
+DEPOSIT_CONFIRMATIONS = 1
+DEPOSIT_WATCHER_INTERVAL = 30  # seconds
+DEPOSIT_WATCHER_MAX_ATTEMPTS = 5
+DEPOSIT_WATCHER_MAX_PAGES = 10  # confirmed history pages scanned per poll
+
+# Results of finished mint and burn signing jobs, keyed by tx hash
+SIGNATURE_RESULTS_FILE = "./data/signature_results.json"
+
+# Job API: withdrawals submitted to /jobs/* run on a bounded worker pool
+JOB_QUEUE_FILE = "./data/jobs.json"
+JOB_WORKERS = 4
+JOB_QUEUE_SIZE = 1000  # queued jobs before submissions are rejected
+JOB_WAIT_MAX = 30  # seconds a GET /jobs/<id>?wait= request may block
+
+# Admission control of the synchronous endpoints: requests beyond the limit
+# wait in a bounded queue, requests beyond the queue and all requests while
+# the signers have no nonces get a 429 with Retry-After
+ADMISSION_LIMITS = {"mint": 16, "send": 4, "burn": 16}  # concurrent requests
+ADMISSION_QUEUE_SIZES = {"mint": 64, "send": 16, "burn": 64}
+ADMISSION_QUEUE_TIMEOUT = 30  # seconds a queued request waits for a slot
+ADMISSION_RETRY_AFTER = 5  # seconds
+
+# Withdrawal batching: burns arriving within the window are paid out in one
+# transaction; the fee is FEE_AMOUNT plus WITHDRAW_BATCH_EXTRA_FEE for every
+# burn after the first, split evenly between the recipients
+WITHDRAW_BATCH_ENABLED = False
+WITHDRAW_BATCH_WINDOW = 10  # seconds
+WITHDRAW_BATCH_MAX = 20
+WITHDRAW_BATCH_EXTRA_FEE = to_satoshis(0.00001000)
+
+# Mint batching: deposits arriving within the window are authorized by one
+# signature over the Merkle root of their mint messages. The ZBTC contract
+# has to accept (root signature, leaf, proof) for this mode.
+MINT_BATCH_ENABLED = False
+MINT_BATCH_WINDOW = 5  # seconds
+MINT_BATCH_MAX = 256
+
+# Local UTXO index of the MPC wallet. Coins selected for a withdrawal are
+# reserved until it is broadcast or fails, at most UTXO_RESERVATION_TTL.
+UTXO_INDEX_REFRESH_INTERVAL = 30  # seconds
+UTXO_RESERVATION_TTL = 600  # seconds
+
+# Consolidation: while the SA is idle, the smallest confirmed coins of the
+# MPC wallet are merged until at most CONSOLIDATION_TARGET_UTXOS remain
+CONSOLIDATION_ENABLED = False
+CONSOLIDATION_TARGET_UTXOS = 20
+CONSOLIDATION_MAX_INPUTS = 50
+CONSOLIDATION_INTERVAL = 300  # seconds
+CONSOLIDATION_FEE_BASE = 200  # sats
+CONSOLIDATION_FEE_PER_INPUT = 150  # sats
+
 MPC_ADDRESS = "tb1pu4gyy8an4af2wnwqd3y682rh4du2cdtvkz3vcjmszdtc2q6etl0saudcz9"
 
+# Backend for node nonces and DKG keys: "log" (append-only log) or "sqlite"
+STORAGE_BACKEND = "log"
+
+# Operator registry. With SUBGRAPH_URL unset the static operator list in
+# abstracts.py is used, e.g.
+# "https://api.studio.thegraph.com/query/85556/bls_apk_registry/version/latest"
+SUBGRAPH_URL = None
+SUBGRAPH_TIMEOUT = 10  # seconds
+SUBGRAPH_PAGE_SIZE = 1000
+NODES_SNAPSHOT_FILE = "./data/operators.json"
+
+# Node-side cache of validated signing payloads
+VALIDATION_CACHE_SIZE = 1024
+VALIDATION_CACHE_TTL = 60  # seconds
+
+# SA nonce pool: refill a node once its pool drops to the low watermark
+NONCE_POOL_LOW_WATERMARK = 20
+NONCE_POOL_HIGH_WATERMARK = 100
+NONCE_POOL_REFILL_INTERVAL = 5  # seconds
+NONCE_POOL_WAIT_TIMEOUT = 30  # seconds
+# Taken nonces neither consumed nor put back by then have their reserved
+# record removed from NONCE_POOL_FILE
+NONCE_POOL_RESERVATION_TTL = 300  # seconds
+NONCE_POOL_FILE = "./data/sa_nonces.json"
+
+# Signer selection: every signing round uses the threshold-sized subset of
+# the DKG party with the best round latency and failure record. Once a round
+# takes longer than SIGNING_HEDGE_PERCENTILE of the recent rounds of its
+# method (SIGNING_HEDGE_DELAY until SIGNING_HEDGE_MIN_SAMPLES were seen), a
+# second subset is started with fresh nonces and the first signature wins;
+# a failed round is retried on another subset. At most SIGNING_MAX_ATTEMPTS
+# subsets are used per signature, the last one waits for the pyfrost timeout.
+NODE_STATS_ALPHA = 0.2  # weight of the newest sample
+NODE_STATS_FAILURE_PENALTY = 10
+# A failed round is charged to each member with this share of a failure
+NODE_STATS_ROUND_FAILURE_WEIGHT = 0.1
+SIGNING_HEDGE_PERCENTILE = 0.99
+SIGNING_HEDGE_MIN_SAMPLES = 20
+SIGNING_HEDGE_DELAY = 60  # seconds
+SIGNING_LATENCY_WINDOW = 500  # recent rounds per method
+SIGNING_MAX_ATTEMPTS = 3
+
+# Node health: every node's pyfrost endpoint is probed; after
+# NODE_HEALTH_FAILURE_THRESHOLD consecutive failed probes or nonce requests
+# the node gets no requests for NODE_HEALTH_OPEN_TIMEOUT seconds.
+NODE_HEALTH_PROBE_PATH = "/pyfrost"
+NODE_HEALTH_PROBE_INTERVAL = 5  # seconds
+NODE_HEALTH_PROBE_TIMEOUT = 2  # seconds
+NODE_HEALTH_FAILURE_THRESHOLD = 3
+NODE_HEALTH_OPEN_TIMEOUT = 30  # seconds
+
+# How the SA gets an even-y aggregate nonce for Taproot signatures:
+# "recycle" swaps single nonces and returns them to the pool, "discard" drops
+# whole odd nonce sets (legacy behaviour)
+BTC_NONCE_PARITY_MODE = "recycle"
+
 
 # Define an enum class
 class DepositType(Enum):
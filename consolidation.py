@@ -0,0 +1,90 @@
+import logging
+import threading
+
+from config import (
+    CONSOLIDATION_INTERVAL,
+    CONSOLIDATION_MAX_INPUTS,
+    CONSOLIDATION_TARGET_UTXOS,
+    DUST_LIMIT,
+)
+from utxo_index import UtxoIndex
+from zbtc_utils import consolidation_fee
+
+
+class ConsolidationScheduler:
+    # Keeps the MPC wallet at no more than `target_utxos` coins so that
+    # withdrawals need one or two inputs. While `is_idle()` holds, the
+    # smallest confirmed coins are merged into one output with
+    # `consolidate(reservation)`, which signs, broadcasts and spends the
+    # reservation.
+    def __init__(
+        self,
+        index: UtxoIndex,
+        consolidate,
+        is_idle,
+        target_utxos: int = CONSOLIDATION_TARGET_UTXOS,
+        max_inputs: int = CONSOLIDATION_MAX_INPUTS,
+    ) -> None:
+        self.index = index
+        self.consolidate = consolidate
+        self.is_idle = is_idle
+        self.target_utxos = target_utxos
+        self.max_inputs = max_inputs
+        self._stop_event = threading.Event()
+        self.consolidations = 0
+        self.consolidated_inputs = 0
+
+    def _pick(self, utxos):
+        # n inputs become one output, so n - 1 coins are removed
+        excess = len(utxos) - self.target_utxos
+        count = min(excess + 1, self.max_inputs)
+        confirmed = sorted(
+            (utxo for utxo in utxos if utxo.get("status", {}).get("confirmed")),
+            key=lambda utxo: utxo["value"],
+        )
+        picked = confirmed[:count]
+        if len(picked) < 2:
+            return []
+        if (
+            sum(utxo["value"] for utxo in picked)
+            < consolidation_fee(len(picked)) + DUST_LIMIT
+        ):
+            return []
+        return picked
+
+    def run_once(self):
+        if not self.is_idle():
+            return None
+        reservation = self.index.reserve_coins(self._pick)
+        with reservation:
+            if not reservation.utxos:
+                return None
+            logging.info(f"Consolidating {len(reservation.utxos)} coins")
+            result = self.consolidate(reservation)
+        self.consolidations += 1
+        self.consolidated_inputs += len(reservation.utxos)
+        return result
+
+    def _run_periodically(self, interval) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Consolidation failed: {e}", exc_info=True)
+
+    def start_scheduler_thread(self, interval: float = CONSOLIDATION_INTERVAL) -> None:
+        self._scheduler_thread = threading.Thread(
+            target=self._run_periodically, args=(interval,)
+        )
+        self._scheduler_thread.daemon = True
+        self._scheduler_thread.start()
+
+    def stop_scheduler_thread(self) -> None:
+        self._stop_event.set()
+        self._scheduler_thread.join()
+
+    def metrics(self):
+        return {
+            "consolidations": self.consolidations,
+            "consolidated_inputs": self.consolidated_inputs,
+        }
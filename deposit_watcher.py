@@ -0,0 +1,173 @@
+import logging
+import threading
+
+import requests
+
+from chain_client import MempoolClient
+from config import (
+    DEPOSIT_CONFIRMATIONS,
+    DEPOSIT_WATCHER_INTERVAL,
+    DEPOSIT_WATCHER_MAX_ATTEMPTS,
+    DEPOSIT_WATCHER_MAX_PAGES,
+    DepositType,
+)
+from utils.storage import KeyValueStore
+
+
+def is_bridge_deposit(tx, mpc_address: str) -> bool:
+    op_pushnum = f"OP_PUSHNUM_{DepositType.BRIDGE.value}"
+    pays_mpc = any(
+        out["scriptpubkey_type"] == "v1_p2tr"
+        and out.get("scriptpubkey_address") == mpc_address
+        for out in tx["vout"]
+    )
+    has_marker = any(
+        out["scriptpubkey_type"] == "op_return"
+        and op_pushnum in out["scriptpubkey_asm"]
+        for out in tx["vout"]
+    )
+    return pays_mpc and has_marker
+
+
+class DepositWatcher:
+    # Scans the MPC wallet for bridge deposits and signs their mint
+    # authorization as soon as they reach the confirmation target. sign_mint
+    # stores the signature, so /mint only has to look it up.
+    def __init__(
+        self,
+        client: MempoolClient,
+        store: KeyValueStore,
+        mpc_address: str,
+        sign_mint,
+        confirmations: int = DEPOSIT_CONFIRMATIONS,
+    ) -> None:
+        self.client = client
+        self.store = store
+        self.mpc_address = mpc_address
+        self.sign_mint = sign_mint
+        self.confirmations = confirmations
+        self._stop_event = threading.Event()
+
+    def _track(self, tx) -> None:
+        key = f"deposit:{tx['txid']}"
+        if key in self.store or not is_bridge_deposit(tx, self.mpc_address):
+            return
+        self.store.set(
+            key,
+            {
+                "bitcoin_address": tx["vin"][0]["prevout"]["scriptpubkey_address"],
+                "status": "pending",
+                "attempts": 0,
+            },
+        )
+        logging.info(f"Found bridge deposit {tx['txid']}")
+
+    def _record_attempt(self, key, deposit, expired_status: str) -> None:
+        attempts = deposit["attempts"] + 1
+        status = (
+            expired_status if attempts >= DEPOSIT_WATCHER_MAX_ATTEMPTS else "pending"
+        )
+        self.store.set(key, {**deposit, "attempts": attempts, "status": status})
+
+    def scan(self) -> None:
+        # The first page holds the mempool and the newest confirmed
+        # transactions, older confirmed pages are walked back until the cursor,
+        # the newest confirmed transaction of the last complete scan. A walk
+        # cut short by DEPOSIT_WATCHER_MAX_PAGES is resumed from its oldest
+        # transaction on the next poll; the cursor only moves once the walk
+        # reached it, so no page in between is skipped.
+        cursor = self.store.get("cursor")
+        walk = self.store.get("walk")
+        txs = self.client.get_address_txs(self.mpc_address)
+        for tx in txs:
+            self._track(tx)
+        confirmed = [tx["txid"] for tx in txs if tx["status"]["confirmed"]]
+        if walk is None:
+            if not confirmed or cursor is None or cursor in confirmed:
+                if confirmed and confirmed[0] != cursor:
+                    self.store.set("cursor", confirmed[0])
+                return
+            walk = {"newest": confirmed[0], "oldest": confirmed[-1]}
+
+        pages = 1
+        while pages < DEPOSIT_WATCHER_MAX_PAGES:
+            txs = self.client.get_address_txs(self.mpc_address, walk["oldest"])
+            pages += 1
+            for tx in txs:
+                self._track(tx)
+            page_txids = [tx["txid"] for tx in txs]
+            if not page_txids or cursor in page_txids:
+                # Transactions newer than walk["newest"] are walked back to
+                # it on the next poll
+                self.store.set("cursor", walk["newest"])
+                self.store.remove("walk")
+                return
+            walk["oldest"] = page_txids[-1]
+        self.store.set("walk", walk)
+        logging.warning(
+            f"Deposit scan stopped after {pages} pages at {walk['oldest']}, "
+            f"resuming towards {cursor}"
+        )
+
+    def sign_confirmed(self) -> int:
+        tip_height = self.client.get_tip_height()
+        signed = 0
+        for key, deposit in self.store.items():
+            if not key.startswith("deposit:") or deposit["status"] != "pending":
+                continue
+            tx_hash = key[len("deposit:") :]
+            try:
+                status = self.client.get_tx(tx_hash)["status"]
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    logging.warning(f"Status of deposit {tx_hash} unavailable: {e}")
+                    continue
+                # Dropped from the mempool or replaced
+                self._record_attempt(key, deposit, "dropped")
+                logging.warning(f"Deposit {tx_hash} not found")
+                continue
+            except Exception as e:
+                logging.warning(f"Status of deposit {tx_hash} unavailable: {e}")
+                continue
+            if (
+                not status["confirmed"]
+                or tip_height - status["block_height"] + 1 < self.confirmations
+            ):
+                continue
+            try:
+                self.sign_mint(tx_hash, deposit["bitcoin_address"])
+            except Exception as e:
+                self._record_attempt(key, deposit, "failed")
+                logging.error(f"Pre-signing mint for {tx_hash} failed: {e}")
+                continue
+            self.store.set(key, {**deposit, "status": "signed"})
+            signed += 1
+            logging.info(f"Pre-signed mint authorization for {tx_hash}")
+        return signed
+
+    def _watch_periodically(self, interval) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.scan()
+                self.sign_confirmed()
+            except Exception as e:
+                logging.error(f"Deposit watcher poll failed: {e}", exc_info=True)
+            self._stop_event.wait(interval)
+
+    def start_watcher_thread(self, interval: float = DEPOSIT_WATCHER_INTERVAL) -> None:
+        self._watcher_thread = threading.Thread(
+            target=self._watch_periodically, args=(interval,)
+        )
+        self._watcher_thread.daemon = True
+        self._watcher_thread.start()
+
+    def stop_watcher_thread(self) -> None:
+        self._stop_event.set()
+        self._watcher_thread.join()
+
+    def metrics(self):
+        statuses = {}
+        for key, deposit in self.store.items():
+            if key.startswith("deposit:"):
+                statuses[deposit["status"]] = statuses.get(deposit["status"], 0) + 1
+        return statuses
@@ -2,7 +2,8 @@ import json
 
 from pyfrost.crypto_utils import is_y_even, code_to_pub
 from pyfrost.network.dkg import Dkg
-from abstracts import NodesInfo
+from abstracts import get_nodes_info
+from node_health import NodeHealth, NodesUnavailable
 import logging
 import time
 import timeit
@@ -15,14 +16,19 @@ import asyncio
 async def initiate_dkg(
     total_node_number: int, threshold: int, n: int, dkg_type: str, dkg_name: any
 ) -> None:
-    nodes_info = NodesInfo()
+    nodes_info = get_nodes_info()
     all_nodes = nodes_info.get_all_nodes(total_node_number)
     dkg = Dkg(nodes_info, default_timeout=50)
 
-    # Random party selection:
+    # Random party selection among the nodes that answer a health probe, a
+    # dead party member would fail the DKG only after the timeout:
+    probes = await NodeHealth(nodes_info, all_nodes).probe_all()
+    healthy = [node_id for node_id in all_nodes if probes[node_id]]
+    if len(healthy) < n:
+        raise NodesUnavailable(f"Only {len(healthy)} of {n} DKG parties are healthy")
     seed = int(time.time())
     random.seed(seed)
-    party = random.sample(all_nodes, n)
+    party = random.sample(healthy, n)
 
     # Requesting DKG:
     now = timeit.default_timer()
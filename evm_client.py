@@ -0,0 +1,129 @@
+import logging
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+from config import (
+    EVM_CONFIRMATIONS,
+    EVM_POOL_SIZE,
+    EVM_RECEIPT_CACHE_SIZE,
+    EVM_RPC_URL,
+    ZBTC_ADDRESS,
+)
+from utils.cache import LRUCache
+
+BURNED_EVENT_ABI = [
+    {
+        "anonymous": False,
+        "inputs": [
+            {
+                "indexed": True,
+                "internalType": "address",
+                "name": "burner",
+                "type": "address",
+            },
+            {
+                "indexed": False,
+                "internalType": "uint256",
+                "name": "amount",
+                "type": "uint256",
+            },
+            {
+                "indexed": False,
+                "internalType": "bytes",
+                "name": "bitcoinAddress",
+                "type": "bytes",
+            },
+            {
+                "indexed": False,
+                "internalType": "uint256",
+                "name": "singleSpendTx",
+                "type": "uint256",
+            },
+        ],
+        "name": "Burned",
+        "type": "event",
+    }
+]
+
+
+BURNED_TOPIC = Web3.keccak(text="Burned(address,uint256,bytes,uint256)")
+
+
+class EvmClient:
+    def __init__(
+        self,
+        rpc_url: str = EVM_RPC_URL,
+        contract_address: str = ZBTC_ADDRESS,
+        confirmations: int = EVM_CONFIRMATIONS,
+        pool_size: int = EVM_POOL_SIZE,
+        receipt_cache_size: int = EVM_RECEIPT_CACHE_SIZE,
+    ) -> None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.web3 = Web3(Web3.HTTPProvider(rpc_url, session=session))
+        self.contract_address = contract_address
+        self.confirmations = confirmations
+        # The ABI is parsed and the event decoder built once per process
+        self.contract = self.web3.eth.contract(
+            address=contract_address, abi=BURNED_EVENT_ABI
+        )
+        self.burned_event = self.contract.events.Burned()
+        self.receipts = LRUCache(receipt_cache_size)
+
+    def get_receipt(self, tx_hash: str):
+        # Only receipts with enough confirmations are final and cached
+        tx_hash = tx_hash.lower()
+        receipt = self.receipts.get(tx_hash)
+        if receipt is None:
+            receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+            depth = self.web3.eth.block_number - receipt["blockNumber"] + 1
+            if depth >= self.confirmations:
+                self.receipts.set(tx_hash, receipt)
+        return receipt
+
+    def decode_burned(self, log) -> Dict:
+        decoded_log = self.burned_event.process_log(log)
+        return {
+            "burner": decoded_log["args"]["burner"],
+            "amount": decoded_log["args"]["amount"],
+            "bitcoinAddress": decoded_log["args"]["bitcoinAddress"].hex(),
+            "singleSpendTx": hex(decoded_log["args"]["singleSpendTx"])[2:],
+        }
+
+    def get_block_number(self) -> int:
+        return self.web3.eth.block_number
+
+    def get_block_hash(self, block_number: int) -> str:
+        return Web3.to_hex(self.web3.eth.get_block(block_number)["hash"])
+
+    def get_burned_logs(self, from_block: int, to_block: int):
+        return self.web3.eth.get_logs(
+            {
+                "address": self.contract_address,
+                "topics": [BURNED_TOPIC],
+                "fromBlock": from_block,
+                "toBlock": to_block,
+            }
+        )
+
+    def get_burned(self, tx_hash: str):
+        receipt = self.get_receipt(tx_hash)
+
+        # Iterate over logs and decode the Burned event
+        for log in receipt["logs"]:
+            if log["address"].lower() == self.contract_address.lower():
+                try:
+                    return self.decode_burned(log)
+                except Exception as e:
+                    logging.debug(f"Skipping undecodable log in {tx_hash}: {e}")
+                    continue
+
+        return None
+
+
+evm_client = EvmClient()
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from utils.storage import KeyValueStore
+
+
+class SignatureResults:
+    # Remembers the result of every successful signing job under a key such as
+    # "mint:<tx_hash>". Repeated requests get the stored result, and requests
+    # arriving while the job runs wait for it instead of signing again. Failed
+    # jobs are not stored so a retry signs again.
+    def __init__(self, store: KeyValueStore) -> None:
+        self.store = store
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        return self.store.get(key)
+
+    async def run(self, key: str, job):
+        # The in-flight future is a concurrent one, so requests served by
+        # different threads and event loops can wait on it.
+        with self._lock:
+            result = self.store.get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.joined += 1
+        if not owner:
+            logging.info(f"Waiting for the in-flight signing job of {key}")
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await job()
+            self.store.set(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def submit(self, key: str, start) -> Future:
+        # Like run(), for jobs completed elsewhere (e.g. by a batcher):
+        # start() returns a concurrent future, and the returned future is
+        # done once the result is stored, without anyone waiting on it.
+        with self._lock:
+            result = self.store.get(key)
+            if result is not None:
+                self.hits += 1
+                done = Future()
+                done.set_result(result)
+                return done
+            future = self._inflight.get(key)
+            if future is not None:
+                self.joined += 1
+                return future
+            future = self._inflight[key] = Future()
+            self.misses += 1
+
+        def finish(started: Future) -> None:
+            try:
+                result = started.result()
+                self.store.set(key, result)
+                future.set_result(result)
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+
+        try:
+            started = start()
+        except BaseException as e:
+            started = Future()
+            started.set_exception(e)
+        started.add_done_callback(finish)
+        return future
+
+    def metrics(self):
+        return {
+            "stored": len(self.store),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "joined": self.joined,
+            "misses": self.misses,
+        }
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Dict
+
+from config import JOB_QUEUE_SIZE, JOB_WORKERS
+from utils.storage import KeyValueStore
+
+FINISHED = ("done", "failed", "interrupted")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    # Persistent queue of signing jobs processed by a fixed number of worker
+    # threads. Jobs are stored under "job:<id>" and every state change is
+    # written through, so queued jobs are run after a restart. Jobs that were
+    # running are only run again if their kind is in `rerunnable`, i.e. safe
+    # to repeat; the others are marked "interrupted" to be checked by hand.
+    # Handlers are coroutine functions taking the job params. A handler that
+    # hands its work on (e.g. to a batcher) returns a concurrent future; the
+    # job then finishes with it and the worker takes the next job.
+    def __init__(
+        self,
+        store: KeyValueStore,
+        handlers: Dict,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_SIZE,
+        rerunnable=(),
+    ) -> None:
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue = queue.Queue()
+        self._changed = threading.Condition()
+        # Callbacks of event loop long polls waiting for a job to finish
+        self._waiters = {}
+        self._seq = 0
+
+        pending = []
+        for key, job in store.items():
+            if not key.startswith("job:"):
+                continue
+            self._seq = max(self._seq, job["seq"])
+            if job["status"] == "running" and job["kind"] not in rerunnable:
+                # It may have broadcast its transaction before the restart
+                self._update(
+                    job, status="interrupted", error="Interrupted by a restart"
+                )
+                logging.warning(
+                    f"Job {job['id']} ({job['kind']}) was interrupted, check it "
+                    f"before submitting it again"
+                )
+            elif job["status"] in ("queued", "running"):
+                pending.append(job)
+        for job in sorted(pending, key=lambda job: job["seq"]):
+            self._update(job, status="queued")
+            self._queue.put(job["id"])
+        if pending:
+            logging.info(f"Requeued {len(pending)} jobs")
+
+    def _update(self, job, **changes):
+        job = {**job, **changes, "updated": time.time()}
+        with self._changed:
+            self.store.set(f"job:{job['id']}", job)
+            self._changed.notify_all()
+            if job["status"] in FINISHED:
+                for wake in self._waiters.pop(job["id"], []):
+                    wake()
+        return job
+
+    def submit(self, kind: str, params: Dict, key: str = None) -> str:
+        # Jobs with the same key share one job unless it failed
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._changed:
+            if key is not None:
+                job_id = self.store.get(f"key:{key}")
+                if job_id is not None and self.get(job_id)["status"] != "failed":
+                    return job_id
+            if self._queue.qsize() >= self.max_queued:
+                raise JobQueueFull(f"{self._queue.qsize()} jobs are queued")
+            self._seq += 1
+            job = {
+                "id": uuid.uuid4().hex,
+                "seq": self._seq,
+                "kind": kind,
+                "params": params,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "created": time.time(),
+            }
+            self._update(job)
+            if key is not None:
+                self.store.set(f"key:{key}", job["id"])
+        self._queue.put(job["id"])
+        return job["id"]
+
+    def get(self, job_id: str):
+        return self.store.get(f"job:{job_id}")
+
+    def wait(self, job_id: str, timeout: float):
+        # Long poll: returns once the job finished or the timeout passed
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                self._changed.wait(remaining)
+
+    async def wait_async(self, job_id: str, timeout: float):
+        # Long poll from an event loop; it is woken by _update, so waiting
+        # holds no thread of the executor the signing path uses
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(
+                lambda: finished.done() or finished.set_result(None)
+            )
+
+        with self._changed:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            self._waiters.setdefault(job_id, []).append(wake)
+        try:
+            await asyncio.wait_for(finished, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._changed:
+                waiters = self._waiters.get(job_id, [])
+                if wake in waiters:
+                    waiters.remove(wake)
+                if not waiters:
+                    self._waiters.pop(job_id, None)
+        return self.get(job_id)
+
+    def _work(self) -> None:
+        while True:
+            job = self.get(self._queue.get())
+            job = self._update(job, status="running")
+            try:
+                result = asyncio.run(self.handlers[job["kind"]](**job["params"]))
+            except Exception as e:
+                self._fail(job, e)
+                continue
+            if isinstance(result, Future):
+                result.add_done_callback(
+                    lambda future, job=job: self._finish(job, future)
+                )
+            else:
+                self._update(job, status="done", result=result)
+
+    def _fail(self, job, e: BaseException) -> None:
+        logging.error(f"Job {job['id']} ({job['kind']}) failed: {e}", exc_info=e)
+        self._update(job, status="failed", error=str(e))
+
+    def _finish(self, job, future: Future) -> None:
+        try:
+            result = future.result()
+        except BaseException as e:
+            self._fail(job, e)
+            return
+        self._update(job, status="done", result=result)
+
+    def start_workers(self) -> None:
+        for _ in range(self.workers):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def metrics(self):
+        statuses = {}
+        for key, job in self.store.items():
+            if key.startswith("job:"):
+                statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+        return {
+            "depth": self.depth(),
+            "workers": self.workers,
+            "statuses": statuses,
+        }
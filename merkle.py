@@ -0,0 +1,58 @@
+from typing import List
+
+from web3 import Web3
+
+
+def keccak(data: bytes) -> bytes:
+    return bytes(Web3.keccak(data))
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    # Pairs are sorted so a proof needs no left/right flags, as in
+    # OpenZeppelin's MerkleProof
+    return keccak(a + b) if a < b else keccak(b + a)
+
+
+def mint_leaf(message: bytes) -> bytes:
+    # Leaves are hashed once more so no inner node can pass as a leaf
+    return keccak(message)
+
+
+class MerkleTree:
+    def __init__(self, leaves: List[bytes]) -> None:
+        assert len(leaves) > 0, "Merkle tree needs at least one leaf"
+        self.leaves = list(leaves)
+        self.levels = [self.leaves]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            # An odd last node is carried up unchanged
+            self.levels.append(
+                [
+                    (
+                        _hash_pair(level[i], level[i + 1])
+                        if i + 1 < len(level)
+                        else level[i]
+                    )
+                    for i in range(0, len(level), 2)
+                ]
+            )
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[bytes]:
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+
+def verify_proof(leaf: bytes, proof: List[bytes], root: bytes) -> bool:
+    node = leaf
+    for sibling in proof:
+        node = _hash_pair(node, sibling)
+    return node == root
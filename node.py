@@ -2,9 +2,14 @@ import os
 import logging
 import sys
 
-from flask import Flask
+from flask import Flask, jsonify
 from pyfrost.network.node import Node
-from abstracts import NodesInfo, NodeDataManager, NodeValidators
+from abstracts import (
+    get_nodes_info,
+    validation_cache,
+    NodeDataManager,
+    NodeValidators,
+)
 from config import PRIVATE_KEY
 
 
@@ -13,7 +18,7 @@ def run_node(node_id: int) -> None:
         f"./data/dkg_keys-{node_id}.json",
         f"./data/nonces-{node_id}.json",
     )
-    nodes_info = NodesInfo()
+    nodes_info = get_nodes_info()
     node = Node(
         data_manager,
         str(node_id),
@@ -25,6 +30,11 @@ def run_node(node_id: int) -> None:
     node_info = nodes_info.lookup_node(str(node_id))
     app = Flask(__name__)
     app.register_blueprint(node.blueprint, url_prefix="/pyfrost")
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return jsonify({"validation_cache": validation_cache.stats()})
+
     app.run(host=node_info["host"], port=int(node_info["port"]), debug=True)
 
 
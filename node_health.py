@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import aiohttp
+
+from config import (
+    NODE_HEALTH_FAILURE_THRESHOLD,
+    NODE_HEALTH_OPEN_TIMEOUT,
+    NODE_HEALTH_PROBE_INTERVAL,
+    NODE_HEALTH_PROBE_PATH,
+    NODE_HEALTH_PROBE_TIMEOUT,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class NodesUnavailable(Exception):
+    pass
+
+
+class NodeHealth:
+    # Circuit breaker per node, fed by active probes of the pyfrost endpoint
+    # and by requests a single node answers (nonce requests). A node is
+    # opened after `failure_threshold` consecutive failures and gets no
+    # requests until `open_timeout` passed; it is then half-open, and the
+    # next probe or request closes it again or reopens it.
+    def __init__(
+        self,
+        nodes_info,
+        node_ids: List[str],
+        failure_threshold: int = NODE_HEALTH_FAILURE_THRESHOLD,
+        open_timeout: float = NODE_HEALTH_OPEN_TIMEOUT,
+        probe_timeout: float = NODE_HEALTH_PROBE_TIMEOUT,
+    ) -> None:
+        self.nodes_info = nodes_info
+        # The configured nodes, of which the registered ones are probed
+        self._configured = list(node_ids)
+        self.node_ids = list(node_ids)
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_at = {}
+        self._probe_event = threading.Event()
+        self._stop_event = threading.Event()
+        self.probes = 0
+        self.probe_failures = 0
+        self.trips = 0
+
+    def _state(self, node_id: str) -> str:
+        opened_at = self._opened_at.get(node_id)
+        if opened_at is None:
+            return CLOSED
+        if time.monotonic() - opened_at < self.open_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def state(self, node_id: str) -> str:
+        with self._lock:
+            return self._state(node_id)
+
+    def allow(self, node_id: str) -> bool:
+        return self.state(node_id) != OPEN
+
+    def available(self, node_ids: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [node_id for node_id in node_ids if self._state(node_id) != OPEN]
+
+    def record_success(self, node_id: str) -> None:
+        with self._lock:
+            if node_id in self._opened_at:
+                logging.info(f"Node {node_id} is healthy again")
+            self._failures[node_id] = 0
+            self._opened_at.pop(node_id, None)
+
+    def record_failure(self, node_id: str) -> None:
+        with self._lock:
+            state = self._state(node_id)
+            if state == OPEN:
+                return
+            self._failures[node_id] = self._failures.get(node_id, 0) + 1
+            # A half-open node is reopened by its first failure
+            if state == HALF_OPEN or self._failures[node_id] >= self.failure_threshold:
+                if state == CLOSED:
+                    self.trips += 1
+                    logging.warning(
+                        f"Node {node_id} failed {self._failures[node_id]} times, "
+                        f"no requests for {self.open_timeout}s"
+                    )
+                self._opened_at[node_id] = time.monotonic()
+
+    def on_nodes_changed(self, old_nodes, new_nodes) -> None:
+        # Deregistered nodes are no longer probed, registered again they are
+        with self._lock:
+            self.node_ids = [
+                node_id for node_id in self._configured if node_id in new_nodes
+            ]
+
+    async def _probe(self, session: aiohttp.ClientSession, node_id: str) -> bool:
+        # Any answer below 500 shows the node's HTTP server is up; a node
+        # removed from the registry meanwhile counts as a failed probe
+        try:
+            node = self.nodes_info.lookup_node(node_id)
+            url = f"http://{node['host']}:{node['port']}{NODE_HEALTH_PROBE_PATH}"
+            async with session.get(url) as response:
+                return response.status < 500
+        except Exception as e:
+            logging.debug(f"Health probe of node {node_id} failed: {e!r}")
+            return False
+
+    async def probe_all(self) -> Dict[str, bool]:
+        # Open nodes are left alone until their timeout passed
+        with self._lock:
+            node_ids = [
+                node_id for node_id in self.node_ids if self._state(node_id) != OPEN
+            ]
+        timeout = aiohttp.ClientTimeout(total=self.probe_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(
+                *[self._probe(session, node_id) for node_id in node_ids]
+            )
+        for node_id, healthy in zip(node_ids, results):
+            if healthy:
+                self.record_success(node_id)
+            else:
+                self.record_failure(node_id)
+        self.probes += len(node_ids)
+        self.probe_failures += results.count(False)
+        return dict(zip(node_ids, results))
+
+    def probe_soon(self) -> None:
+        # Called after failed signing rounds, which do not tell which member
+        # failed, to check the nodes without waiting for the next interval
+        self._probe_event.set()
+
+    def _probe_periodically(self, interval) -> None:
+        while not self._stop_event.is_set():
+            try:
+                asyncio.run(self.probe_all())
+            except Exception as e:
+                logging.error(f"Node health probing failed: {e}")
+            self._probe_event.wait(interval)
+            self._probe_event.clear()
+
+    def start_probe_thread(self, interval: float = NODE_HEALTH_PROBE_INTERVAL) -> None:
+        self._probe_thread = threading.Thread(
+            target=self._probe_periodically, args=(interval,)
+        )
+        self._probe_thread.daemon = True
+        self._probe_thread.start()
+
+    def stop_probe_thread(self) -> None:
+        self._stop_event.set()
+        self._probe_event.set()
+        self._probe_thread.join()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "states": {node_id: self._state(node_id) for node_id in self.node_ids},
+                "probes": self.probes,
+                "probe_failures": self.probe_failures,
+                "trips": self.trips,
+            }
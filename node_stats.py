@@ -0,0 +1,137 @@
+import threading
+from collections import deque
+from typing import Iterable, List
+
+from config import (
+    NODE_STATS_ALPHA,
+    NODE_STATS_FAILURE_PENALTY,
+    SIGNING_HEDGE_DELAY,
+    SIGNING_HEDGE_MIN_SAMPLES,
+    SIGNING_HEDGE_PERCENTILE,
+    SIGNING_LATENCY_WINDOW,
+)
+
+
+class NodeStats:
+    # Exponentially weighted latency and failure rate of every node. A node is
+    # ranked by the latency of the signing rounds it took part in, which
+    # includes the validation on the nodes; until it took part in one, the
+    # latency of its nonce requests stands in, and without that the median
+    # nonce latency of the others. A round is as slow as its slowest member,
+    # so rounds are told apart over many different subsets. A failed round
+    # does not tell which member failed, so it is charged to every member
+    # with a small weight. The latencies of recent rounds are kept per method
+    # to decide when a signing request is hedged.
+    def __init__(
+        self,
+        alpha: float = NODE_STATS_ALPHA,
+        failure_penalty: float = NODE_STATS_FAILURE_PENALTY,
+    ) -> None:
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self._latency = {}
+        self._round_latency = {}
+        self._failure_rate = {}
+        self._samples = {}
+        self._method_latencies = {}
+        self._lock = threading.Lock()
+
+    def _ewma(self, previous: float, sample: float) -> float:
+        if previous is None:
+            return sample
+        return self.alpha * sample + (1 - self.alpha) * previous
+
+    def _observe(
+        self, node_id: str, latency: float, failed: bool, weight: float = 1.0
+    ) -> None:
+        with self._lock:
+            failure = 1.0 if failed else 0.0
+            if node_id not in self._samples:
+                self._latency[node_id] = latency
+                self._failure_rate[node_id] = failure * weight
+                self._samples[node_id] = 1
+                return
+            if latency is not None:
+                self._latency[node_id] = self._ewma(self._latency[node_id], latency)
+            alpha = self.alpha * weight
+            self._failure_rate[node_id] = (
+                alpha * failure + (1 - alpha) * self._failure_rate[node_id]
+            )
+            self._samples[node_id] += 1
+
+    def record_success(self, node_id: str, latency: float = None) -> None:
+        self._observe(node_id, latency, failed=False)
+
+    def record_failure(self, node_id: str, weight: float = 1.0) -> None:
+        self._observe(node_id, None, failed=True, weight=weight)
+
+    def record_round(self, method: str, party: List[str], latency: float) -> None:
+        # Also called with the elapsed time of rounds cancelled by a faster
+        # hedge, a lower bound that keeps slow rounds in the tail
+        with self._lock:
+            for node_id in party:
+                self._round_latency[node_id] = self._ewma(
+                    self._round_latency.get(node_id), latency
+                )
+            latencies = self._method_latencies.setdefault(
+                method, deque(maxlen=SIGNING_LATENCY_WINDOW)
+            )
+            latencies.append(latency)
+
+    def hedge_delay(self, method: str) -> float:
+        # SIGNING_HEDGE_PERCENTILE of the recent round latencies of the
+        # method, i.e. of the slowest member of each round
+        with self._lock:
+            latencies = sorted(self._method_latencies.get(method, ()))
+        if len(latencies) < SIGNING_HEDGE_MIN_SAMPLES:
+            return SIGNING_HEDGE_DELAY
+        index = min(int(SIGNING_HEDGE_PERCENTILE * len(latencies)), len(latencies) - 1)
+        return latencies[index]
+
+    def _median_latency(self) -> float:
+        latencies = sorted(
+            latency for latency in self._latency.values() if latency is not None
+        )
+        return latencies[len(latencies) // 2] if latencies else 1.0
+
+    def score(self, node_id: str) -> float:
+        with self._lock:
+            latency = self._round_latency.get(node_id)
+            if latency is None:
+                latency = self._latency.get(node_id)
+            if latency is None:
+                latency = self._median_latency()
+            failure_rate = self._failure_rate.get(node_id, 0.0)
+            return latency * (1 + self.failure_penalty * failure_rate)
+
+    def choose_party(
+        self, party: List[str], size: int, avoid: Iterable[str] = ()
+    ) -> List[str]:
+        # The `size` best scored members; members in `avoid` (e.g. those of a
+        # failed or slow attempt) are only used when there are not enough
+        # others
+        avoid = set(avoid)
+        ranked = sorted(
+            party, key=lambda node_id: (node_id in avoid, self.score(node_id))
+        )
+        chosen = set(ranked[:size])
+        # Keeps the party order of the DKG key
+        return [node_id for node_id in party if node_id in chosen]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "nodes": {
+                    node_id: {
+                        "latency": self._latency.get(node_id),
+                        "round_latency": self._round_latency.get(node_id),
+                        "failure_rate": self._failure_rate.get(node_id, 0.0),
+                        "samples": self._samples.get(node_id, 0),
+                    }
+                    for node_id in self._samples.keys() | self._round_latency.keys()
+                },
+                "round_samples": {
+                    method: len(latencies)
+                    for method, latencies in self._method_latencies.items()
+                },
+            }
@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import timeit
+from collections import Counter, deque
+from typing import Dict, List
+
+from config import (
+    NONCE_POOL_HIGH_WATERMARK,
+    NONCE_POOL_LOW_WATERMARK,
+    NONCE_POOL_REFILL_INTERVAL,
+    NONCE_POOL_RESERVATION_TTL,
+    NONCE_POOL_WAIT_TIMEOUT,
+)
+from utils.storage import KeyValueStore
+
+
+class NoncePoolExhausted(Exception):
+    pass
+
+
+def nonce_key(node_id: str, nonce) -> str:
+    digest = hashlib.sha256(json.dumps(nonce, sort_keys=True).encode()).hexdigest()
+    return f"{node_id}:{digest}"
+
+
+class NoncePool:
+    def __init__(
+        self,
+        sa,
+        node_ids: List[str],
+        low_watermark: int = NONCE_POOL_LOW_WATERMARK,
+        high_watermark: int = NONCE_POOL_HIGH_WATERMARK,
+        store: KeyValueStore = None,
+        stats=None,
+        health=None,
+    ) -> None:
+        assert (
+            0 <= low_watermark < high_watermark
+        ), "low watermark must be below high watermark"
+        self.sa = sa
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._nonces = {node_id: deque() for node_id in node_ids}
+        self._condition = threading.Condition()
+        self._refill_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._refill_latencies = deque(maxlen=100)
+        self._refill_failures = 0
+        self._waits = 0
+        self._counters = Counter()
+        self._inactive = set()
+        # Store keys of taken nonces that are neither consumed nor put back
+        # yet, with the time they were taken
+        self._reserved = {}
+        self.store = store
+        # Optional NodeStats fed with the latency of every nonce request
+        self.stats = stats
+        # Optional NodeHealth: nodes with an open circuit are not refilled
+        self.health = health
+        if store is not None:
+            self._load()
+
+    def _load(self) -> None:
+        # Nonces that were reserved when the process stopped may already have
+        # been sent to the nodes, so they are dropped instead of reused, as are
+        # the nonces of nodes that are no longer configured.
+        dropped = []
+        for key, entry in self.store.items():
+            if entry["state"] != "available" or entry["node_id"] not in self._nonces:
+                dropped.append(key)
+            else:
+                self._nonces[entry["node_id"]].append(entry["nonce"])
+        self.store.remove_many(dropped)
+        logging.info(
+            f"Loaded {len(self.store)} persisted nonces, dropped {len(dropped)} "
+            f"reserved or of unknown nodes"
+        )
+
+    def _persist(self, nonces: Dict[str, List], state: str) -> None:
+        if self.store is None:
+            return
+        self.store.update(
+            {
+                nonce_key(node_id, nonce): {
+                    "node_id": node_id,
+                    "nonce": nonce,
+                    "state": state,
+                }
+                for node_id, node_nonces in nonces.items()
+                for nonce in node_nonces
+            }
+        )
+
+    def _drop_expired_reservations(self) -> None:
+        # Taken nonces that were lost on an error path are not in the queues
+        # any more, only their "reserved" records are left to remove
+        now = time.monotonic()
+        with self._condition:
+            expired = [
+                key
+                for key, taken_at in self._reserved.items()
+                if now - taken_at >= NONCE_POOL_RESERVATION_TTL
+            ]
+            for key in expired:
+                del self._reserved[key]
+        if expired and self.store is not None:
+            self.store.remove_many(expired)
+            logging.warning(f"Dropped {len(expired)} expired nonce reservations")
+
+    def depth(self, node_id: str) -> int:
+        with self._condition:
+            return len(self._nonces.get(node_id, ()))
+
+    def ready(self, party: List[str], size: int) -> bool:
+        # Whether `size` members of the party have a nonce to sign with
+        with self._condition:
+            return sum(1 for node_id in party if self._nonces.get(node_id)) >= size
+
+    def _deficits(self, force: bool = False) -> Dict[str, int]:
+        with self._condition:
+            return {
+                node_id: self.high_watermark - len(nonces)
+                for node_id, nonces in self._nonces.items()
+                if node_id not in self._inactive
+                and (self.health is None or self.health.allow(node_id))
+                and (force or len(nonces) <= self.low_watermark)
+            }
+
+    def on_nodes_changed(self, old_nodes, new_nodes) -> None:
+        # Deregistered nodes keep their remaining nonces but are not refilled
+        with self._condition:
+            self._inactive = set(self._nonces) - set(new_nodes)
+        if self._inactive:
+            logging.info(f"Nonce refill paused for nodes {sorted(self._inactive)}")
+
+    async def _refill_node(self, node_id: str, number_of_nonces: int) -> None:
+        now = timeit.default_timer()
+        try:
+            response = await self.sa.request_nonces(
+                [node_id], number_of_nonces=number_of_nonces
+            )
+            node_nonces = response[node_id]["data"]
+        except Exception as e:
+            self._refill_failures += 1
+            if self.stats is not None:
+                self.stats.record_failure(node_id)
+            if self.health is not None:
+                self.health.record_failure(node_id)
+            logging.warning(f"Nonce refill for node {node_id} failed: {e}")
+            return
+        latency = timeit.default_timer() - now
+        if self.stats is not None:
+            self.stats.record_success(node_id, latency)
+        if self.health is not None:
+            self.health.record_success(node_id)
+        self._persist({node_id: node_nonces}, "available")
+        with self._condition:
+            self._nonces[node_id].extend(node_nonces)
+            self._refill_latencies.append(latency)
+            self._condition.notify_all()
+        logging.debug(
+            f"Refilled {len(node_nonces)} nonces for node {node_id} in {latency:.3f}s"
+        )
+
+    async def refill(self, force: bool = False) -> None:
+        deficits = self._deficits(force)
+        await asyncio.gather(
+            *[
+                self._refill_node(node_id, deficit)
+                for node_id, deficit in deficits.items()
+                if deficit > 0
+            ]
+        )
+
+    def _refill_periodically(self) -> None:
+        # Top every node up to the high watermark once, then refill on demand
+        asyncio.run(self.refill(force=True))
+        while not self._stop_event.is_set():
+            self._refill_event.wait(NONCE_POOL_REFILL_INTERVAL)
+            self._refill_event.clear()
+            self._drop_expired_reservations()
+            if self._deficits():
+                asyncio.run(self.refill())
+
+    def start_refill_thread(self) -> None:
+        self._refill_thread = threading.Thread(target=self._refill_periodically)
+        self._refill_thread.daemon = True
+        self._refill_thread.start()
+
+    def stop_refill_thread(self) -> None:
+        self._stop_event.set()
+        self._refill_event.set()
+        self._refill_thread.join()
+
+    def take(self, party: List[str], timeout: float = NONCE_POOL_WAIT_TIMEOUT) -> Dict:
+        with self._condition:
+            if not all(self._nonces[node_id] for node_id in party):
+                # Nodes with an open circuit are not refilled, waiting for
+                # their nonces would only run into the timeout
+                unavailable = [
+                    node_id
+                    for node_id in party
+                    if not self._nonces[node_id]
+                    and self.health is not None
+                    and not self.health.allow(node_id)
+                ]
+                if unavailable:
+                    raise NoncePoolExhausted(
+                        f"No nonces available for unhealthy nodes {unavailable}"
+                    )
+                self._waits += 1
+                self._refill_event.set()
+                available = self._condition.wait_for(
+                    lambda: all(self._nonces[node_id] for node_id in party), timeout
+                )
+                if not available:
+                    raise NoncePoolExhausted(
+                        f"No nonces available for party {party} after {timeout}s"
+                    )
+            nonces_dict = {
+                node_id: self._nonces[node_id].popleft() for node_id in party
+            }
+            if any(
+                len(self._nonces[node_id]) <= self.low_watermark for node_id in party
+            ):
+                self._refill_event.set()
+            now = time.monotonic()
+            for node_id, nonce in nonces_dict.items():
+                self._reserved[nonce_key(node_id, nonce)] = now
+        self._persist(
+            {node_id: [nonce] for node_id, nonce in nonces_dict.items()}, "reserved"
+        )
+        return nonces_dict
+
+    def put_back(self, nonces: Dict[str, List]) -> None:
+        # Returned nonces were never sent to a node, so they go to the front
+        # of the queue and are the first ones handed out again. They are
+        # persisted as available before they are queued: written later, the
+        # record could overwrite the removal by a consume() of another thread
+        # and bring back a used nonce after a restart.
+        with self._condition:
+            self._persist(nonces, "available")
+            for node_id, node_nonces in nonces.items():
+                for nonce in node_nonces:
+                    self._reserved.pop(nonce_key(node_id, nonce), None)
+                self._nonces[node_id].extendleft(reversed(node_nonces))
+            self._condition.notify_all()
+
+    def consume(self, nonces_dict: Dict) -> None:
+        # Must be called before the nonces are sent to the nodes; also drops
+        # taken nonces that will not be used
+        keys = [nonce_key(node_id, nonce) for node_id, nonce in nonces_dict.items()]
+        with self._condition:
+            for key in keys:
+                self._reserved.pop(key, None)
+        if self.store is None:
+            return
+        self.store.remove_many(keys)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._condition:
+            self._counters[name] += value
+
+    def metrics(self) -> Dict:
+        with self._condition:
+            depth = {node_id: len(nonces) for node_id, nonces in self._nonces.items()}
+            latencies = list(self._refill_latencies)
+            counters = dict(self._counters)
+        return {
+            "depth": depth,
+            "low_watermark": self.low_watermark,
+            "high_watermark": self.high_watermark,
+            "refill_latency": {
+                "last": latencies[-1] if latencies else None,
+                "average": sum(latencies) / len(latencies) if latencies else None,
+                "max": max(latencies) if latencies else None,
+            },
+            "refill_failures": self._refill_failures,
+            "waits": self._waits,
+            "counters": counters,
+            "persisted": len(self.store) if self.store is not None else None,
+            "reserved": len(self._reserved),
+        }
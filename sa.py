@@ -1,5 +1,6 @@
 import json
 import sys
+import threading
 
 import pyfrost
 from bitcoinutils.keys import PublicKey, P2wpkhAddress
@@ -7,28 +8,71 @@ from bitcoinutils.setup import setup
 from bitcoinutils.transactions import TxWitnessInput
 from bitcoinutils.utils import to_satoshis
 from flask import Flask, request, jsonify
+from hexbytes import HexBytes
 from web3 import Web3
 
 from zbtc_utils import (
     get_taproot_address,
     broadcast_tx,
-    get_utxos,
     get_withdraw_tx,
     get_simple_withdraw_tx,
+    get_batch_withdraw_tx,
+    get_consolidation_tx,
     get_deposit,
     get_burned,
+    classify_withdraw_deposits,
+    withdraw_deposit_flags,
 )
+from chain_client import mempool_client, tx_cache
+from deposit_watcher import DepositWatcher
+from idempotency import SignatureResults
+from jobs import JobQueue, JobQueueFull
+from batcher import Batcher
+from admission import AdmissionLimit, AdmissionRejected
+from utxo_index import UtxoIndex
+from consolidation import ConsolidationScheduler
+from merkle import MerkleTree, mint_leaf
+from evm_client import evm_client
+from burn_indexer import BurnIndexer
 from pyfrost.crypto_utils import bytes_from_int, code_to_pub, is_y_even, pub_compress
 from pyfrost.network.sa import SA
-from abstracts import NodesInfo
+from abstracts import get_nodes_info
+from nonce_pool import NoncePool, NoncePoolExhausted
+from node_stats import NodeStats
+from node_health import NodeHealth, NodesUnavailable
+from utils.storage import open_store
 import logging
 import os
 import asyncio
+import time
+import timeit
 
 from config import (
+    ADMISSION_LIMITS,
+    ADMISSION_QUEUE_SIZES,
+    ADMISSION_RETRY_AFTER,
     FEE_AMOUNT,
+    JOB_QUEUE_FILE,
+    JOB_WAIT_MAX,
     BTC_NETWORK,
-    ZBTC_ADDRESS,
+    BTC_NONCE_PARITY_MODE,
+    BURN_INDEXER_ENABLED,
+    BURN_INDEXER_FILE,
+    CONSOLIDATION_ENABLED,
+    DEPOSIT_WATCHER_ENABLED,
+    DEPOSIT_WATCHER_FILE,
+    NONCE_POOL_FILE,
+    SIGNATURE_RESULTS_FILE,
+    NODE_STATS_ROUND_FAILURE_WEIGHT,
+    SIGNING_MAX_ATTEMPTS,
+    MINT_BATCH_ENABLED,
+    MINT_BATCH_MAX,
+    MINT_BATCH_WINDOW,
+    WITHDRAW_BATCH_ENABLED,
+    WITHDRAW_BATCH_EXTRA_FEE,
+    WITHDRAW_BATCH_MAX,
+    WITHDRAW_BATCH_WINDOW,
+    STORAGE_BACKEND,
     MPC_ADDRESS,
     DepositType,
 )
@@ -36,15 +80,25 @@ from config import (
 setup(BTC_NETWORK)
 
 app = Flask(__name__)
-rpc_url = "https://ethereum-holesky-rpc.publicnode.com"
-web3 = Web3(Web3.HTTPProvider(rpc_url))
 
 mpc_dkg_key = None
 eth_dkg_key = None
 mpc_address = None
 mpc_public_key = None
 eth_public_key = None
-nonces = {}
+nonce_pool = None
+node_stats = NodeStats()
+node_health = None
+aggregator = None
+burn_indexer = None
+deposit_watcher = None
+signature_results = None
+jobs = None
+withdrawal_batcher = None
+mint_batcher = None
+utxo_index = None
+consolidation_scheduler = None
+admission = None
 
 
 async def initialization(total_node_number: int) -> None:
@@ -53,16 +107,41 @@ async def initialization(total_node_number: int) -> None:
     global mpc_address
     global mpc_public_key
     global eth_public_key
-    global nonces
-
-    nodes_info = NodesInfo()
+    global nonce_pool
+    global node_health
+    global aggregator
+    global burn_indexer
+    global deposit_watcher
+    global signature_results
+    global jobs
+    global withdrawal_batcher
+    global mint_batcher
+    global utxo_index
+    global consolidation_scheduler
+    global admission
+
+    signature_results = SignatureResults(
+        open_store(SIGNATURE_RESULTS_FILE, STORAGE_BACKEND)
+    )
+    nodes_info = get_nodes_info()
     all_nodes = nodes_info.get_all_nodes(total_node_number)
-    sa = SA(nodes_info, default_timeout=50)
-    nonces = {}
-    nonces_response = await sa.request_nonces(all_nodes, number_of_nonces=30)
-    for node_id in all_nodes:
-        nonces.setdefault(node_id, [])
-        nonces[node_id] += nonces_response[node_id]["data"]
+    aggregator = SA(nodes_info, default_timeout=50)
+    node_health = NodeHealth(nodes_info, all_nodes)
+    nodes_info.subscribe(node_health.on_nodes_changed)
+    await node_health.probe_all()
+    node_health.start_probe_thread()
+    nonce_pool = NoncePool(
+        aggregator,
+        all_nodes,
+        store=open_store(NONCE_POOL_FILE, STORAGE_BACKEND),
+        stats=node_stats,
+        health=node_health,
+    )
+    nodes_info.subscribe(nonce_pool.on_nodes_changed)
+    # Only nodes without usable persisted nonces delay startup, the rest of
+    # the deficit is topped up in the background.
+    await nonce_pool.refill()
+    nonce_pool.start_refill_thread()
 
     # Retrieving DKGs:
     dkg_file_path = "dkgs.json"
@@ -82,159 +161,395 @@ async def initialization(total_node_number: int) -> None:
     logging.info(f"MPC Wallet: {mpc_address}")
     logging.info(f"Ethereum Public Key: {eth_public_key}")
 
+    # Mints are signed with the Ethereum key, withdrawals with the MPC key
+    admission = {
+        endpoint: AdmissionLimit(
+            endpoint,
+            ADMISSION_LIMITS[endpoint],
+            ADMISSION_QUEUE_SIZES[endpoint],
+            ready=lambda dkg_key=dkg_key: signers_ready(dkg_key),
+        )
+        for endpoint, dkg_key in (
+            ("mint", eth_dkg_key),
+            ("send", mpc_dkg_key),
+            ("burn", mpc_dkg_key),
+        )
+    }
+
+    utxo_index = UtxoIndex(mempool_client, mpc_address, classify_withdraw_deposits)
+    await asyncio.to_thread(utxo_index.refresh)
+    utxo_index.start_refresh_thread()
+
+    if WITHDRAW_BATCH_ENABLED:
+        # All burns of a batch share the transaction
+        withdrawal_batcher = Batcher(
+            lambda burns: [asyncio.run(process_burn_batch(aggregator, burns))]
+            * len(burns),
+            WITHDRAW_BATCH_WINDOW,
+            WITHDRAW_BATCH_MAX,
+        )
+        withdrawal_batcher.start_batcher_thread()
+
+    if MINT_BATCH_ENABLED:
+        mint_batcher = Batcher(
+            lambda mints: asyncio.run(process_mint_batch(aggregator, mints)),
+            MINT_BATCH_WINDOW,
+            MINT_BATCH_MAX,
+        )
+        mint_batcher.start_batcher_thread()
+
+    # Jobs left over from the last run start once the keys are loaded
+    jobs = JobQueue(
+        open_store(JOB_QUEUE_FILE, STORAGE_BACKEND),
+        {"burn": run_burn_job, "send": run_send_job},
+        # A burn spends its single-spend outpoint, so a repeated withdrawal
+        # cannot be broadcast; a repeated send would pay twice
+        rerunnable=("burn",),
+    )
+    jobs.start_workers()
+
+    if CONSOLIDATION_ENABLED:
+        consolidation_scheduler = ConsolidationScheduler(
+            utxo_index,
+            lambda reservation: asyncio.run(
+                process_consolidation(aggregator, reservation)
+            ),
+            is_idle,
+        )
+        consolidation_scheduler.start_scheduler_thread()
+
+    if BURN_INDEXER_ENABLED:
+        burn_indexer = BurnIndexer(
+            evm_client, open_store(BURN_INDEXER_FILE, STORAGE_BACKEND)
+        )
+        burn_indexer.start_indexer_thread()
+        worker = threading.Thread(target=process_withdrawal_queue)
+        worker.daemon = True
+        worker.start()
+
+    if DEPOSIT_WATCHER_ENABLED:
+        deposit_watcher = DepositWatcher(
+            mempool_client,
+            open_store(DEPOSIT_WATCHER_FILE, STORAGE_BACKEND),
+            mpc_address,
+            lambda tx_hash, bitcoin_address: asyncio.run(
+                process_mint(aggregator, tx_hash, bitcoin_address)
+            ),
+        )
+        deposit_watcher.start_watcher_thread()
+
+
+def signers_ready(dkg_key):
+    # Whether enough healthy signers of the key have nonces in the pool
+    party = node_health.available(dkg_key["party"])
+    return nonce_pool.ready(party, dkg_key.get("threshold", len(dkg_key["party"])))
+
 
 def get_nonces(party, key_type="ETH", message=None):
-    is_even = False
-    while not is_even:
-        nonces_dict = {}
-        for node_id in party:
-            nonce = nonces[node_id].pop()
-            nonces_dict[node_id] = nonce
-        if key_type == "ETH":
-            return nonces_dict
-        assert message is not None, "str_message cannot be None"
-        aggregated_public_nonce = pyfrost.aggregate_nonce(message, nonces_dict)
-        is_even = is_y_even(aggregated_public_nonce)
+    nonces_dict = nonce_pool.take(party)
+    if key_type == "ETH":
+        nonce_pool.count("used_sets")
+        return nonces_dict
+    assert message is not None, "str_message cannot be None"
+    parked = {}
+    attempt = 0
+    try:
+        while not is_y_even(pyfrost.aggregate_nonce(message, nonces_dict)):
+            if BTC_NONCE_PARITY_MODE == "discard":
+                nonce_pool.count("discarded_sets")
+                nonce_pool.consume(nonces_dict)
+                nonces_dict = nonce_pool.take(party)
+                continue
+            # Replacing one commitment changes every binding factor and thus
+            # re-rolls the parity; the replaced nonce is kept for a later message.
+            node_id = party[attempt % len(party)]
+            attempt += 1
+            parked.setdefault(node_id, []).append(nonces_dict[node_id])
+            nonces_dict[node_id] = nonce_pool.take([node_id])[node_id]
+            nonce_pool.count("recycled_nonces")
+    finally:
+        nonce_pool.put_back(parked)
+    nonce_pool.count("used_sets")
     return nonces_dict
 
 
-@app.route("/mint", methods=["POST"])
-def mint():
-    try:
-        # Extracting fee and tx_hash and public_key_hex from the request body
-        data = request.json
-        tx_hash = data["tx_hash"]
-        bitcoin_address = P2wpkhAddress(data["public_key"]).to_string()
-        logging.info(f"Minting for {bitcoin_address} with hash {tx_hash}")
-
-        nodes_info = NodesInfo()
-        sa = SA(nodes_info, default_timeout=50)
-
-        dkg_party = eth_dkg_key["party"]
-        nonces_dict = get_nonces(dkg_party)
-
-        deposit = get_deposit(tx_hash, bitcoin_address, MPC_ADDRESS, DepositType.BRIDGE)
-        msg = Web3.solidity_keccak(
-            ["uint256", "uint256", "address"],
-            [
-                int(deposit["tx"], 16),
-                deposit["amount"],
-                Web3.to_checksum_address(deposit["eth_address"]),
-            ],
-        ).hex()
+async def request_signature(sa, dkg_key, data, key_type="ETH"):
+    # Signs with the fastest threshold-sized subset of the DKG party. Once a
+    # round takes longer than the hedge delay of its method (a high
+    # percentile of its recent rounds), another subset is started with fresh
+    # nonces and the first signature wins; a failed round is retried on
+    # another subset. Nonces of a started round are never reused, the nodes
+    # may already have used them. Members with an open circuit are left out,
+    # if too few remain the request fails right away instead of waiting for
+    # the timeout.
+    dkg_party = dkg_key["party"]
+    size = dkg_key.get("threshold", len(dkg_party))
+    message = data["data"]["hash"] if key_type == "BTC" else None
+    method = data["method"]
+    tried = set()
+    # Running rounds: task -> (party, start time)
+    rounds = {}
+
+    async def start_round():
+        healthy = node_health.available(dkg_party)
+        if len(healthy) < size:
+            raise NodesUnavailable(
+                f"{len(healthy)} of {size} signers needed are healthy"
+            )
+        party = node_stats.choose_party(healthy, size, avoid=tried)
+        tried.update(party)
+        nonces_dict = await asyncio.to_thread(get_nonces, party, key_type, message)
+        nonce_pool.consume(nonces_dict)
+        task = asyncio.ensure_future(
+            sa.request_signature(dkg_key, nonces_dict, data, party)
+        )
+        rounds[task] = (party, timeit.default_timer())
 
-        data = {
-            "method": "mint",
-            "data": {
-                "tx": tx_hash,
-                "bitcoin_address": bitcoin_address,
-                "amount": deposit["amount"],
-                "hash": msg,
-                "to": Web3.to_checksum_address(deposit["eth_address"]),
-            },
+    try:
+        await start_round()
+        started = 1
+        error = None
+        while rounds:
+            timeout = None
+            if started < SIGNING_MAX_ATTEMPTS:
+                last_start = max(start for _, start in rounds.values())
+                timeout = max(
+                    last_start
+                    + node_stats.hedge_delay(method)
+                    - timeit.default_timer(),
+                    0,
+                )
+            done, _ = await asyncio.wait(
+                rounds, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                started += 1
+                nonce_pool.count("signing_hedges")
+                try:
+                    await start_round()
+                except (NodesUnavailable, NoncePoolExhausted) as e:
+                    # The running rounds may still succeed
+                    logging.warning(f"Cannot hedge slow signing round: {e}")
+                continue
+            sig = None
+            for task in done:
+                party, start = rounds.pop(task)
+                try:
+                    result = task.result()
+                    assert (
+                        result["result"] == "SUCCESSFUL"
+                    ), f"Signature failed: Signature status: {result['result']}"
+                except Exception as e:
+                    error = e
+                    for node_id in party:
+                        node_stats.record_failure(
+                            node_id, NODE_STATS_ROUND_FAILURE_WEIGHT
+                        )
+                    node_health.probe_soon()
+                    logging.warning(f"Signing with party {party} failed: {e!r}")
+                    continue
+                if sig is not None:
+                    continue
+                sig = result
+                latency = timeit.default_timer() - start
+                node_stats.record_round(method, party, latency)
+                logging.debug(f"Signed with party {party} in {latency:.3f}s")
+                for node_id in party:
+                    node_stats.record_success(node_id)
+                    node_health.record_success(node_id)
+            if sig is not None:
+                # Rounds overtaken by a hedge were at least this slow
+                now = timeit.default_timer()
+                for party, start in rounds.values():
+                    node_stats.record_round(method, party, now - start)
+                return sig
+            if not rounds and started < SIGNING_MAX_ATTEMPTS:
+                started += 1
+                nonce_pool.count("signing_retries")
+                await start_round()
+        raise error
+    finally:
+        for task in rounds:
+            task.cancel()
+
+
+async def sign_tx_digests(sa, data, tx_digests):
+    # All inputs of a transaction are signed in one concurrent round, so the
+    # latency no longer grows with the number of inputs.
+    signature_requests = []
+    for tx_digest in tx_digests:
+        input_data = {
+            "method": data["method"],
+            "data": {**data["data"], "hash": tx_digest.hex()},
         }
-
-        sig = asyncio.run(
-            sa.request_signature(eth_dkg_key, nonces_dict, data, dkg_party)
+        signature_requests.append(
+            asyncio.ensure_future(
+                request_signature(sa, mpc_dkg_key, input_data, "BTC")
+            )
         )
-        assert (
-            sig["result"] == "SUCCESSFUL"
-        ), f"Signature failed: Signature status: {sig['result']}"
-        logging.info(f"Minting siganture is: {sig}")
-        return jsonify(sig)
-    except Exception as e:
-        logging.error(f"Error in burn process: {str(e)}", exc_info=True)
-        return jsonify({"status": "error", "message": str(e)}), 500
+    try:
+        group_signs = await asyncio.gather(*signature_requests)
+    except BaseException:
+        # The transaction cannot be completed, the other inputs stop retrying
+        # and using nonces
+        for signature_request in signature_requests:
+            signature_request.cancel()
+        raise
+
+    witnesses = []
+    for group_sign in group_signs:
+        sig = bytes_from_int(
+            int(group_sign["public_nonce"]["x"], 16)
+        ) + bytes_from_int(group_sign["signature"])
+        witnesses.append(TxWitnessInput([sig.hex()]))
+    return witnesses
+
+
+async def process_mint(sa, tx_hash, public_key):
+    # Deposits seen by the watcher are usually signed ahead of the request
+    return await signature_results.run(
+        f"mint:{tx_hash.lower()}", lambda: sign_mint(sa, tx_hash, public_key)
+    )
 
 
-@app.route("/send", methods=["POST"])
-def send():
-    try:
-        # Extracting fee and tx_hash from the request body
-        data = request.json
-        to_address = data["to"]
-        amount = data["amount"]
-        logging.info(f"Sending to {to_address}")
+async def get_mint_data(tx_hash, bitcoin_address):
+    deposit = await asyncio.to_thread(
+        get_deposit, tx_hash, bitcoin_address, MPC_ADDRESS, DepositType.BRIDGE
+    )
+    msg = Web3.solidity_keccak(
+        ["uint256", "uint256", "address"],
+        [
+            int(deposit["tx"], 16),
+            deposit["amount"],
+            Web3.to_checksum_address(deposit["eth_address"]),
+        ],
+    ).hex()
+    return msg, {
+        "tx": tx_hash,
+        "bitcoin_address": bitcoin_address,
+        "amount": deposit["amount"],
+        "to": Web3.to_checksum_address(deposit["eth_address"]),
+    }
+
+
+async def sign_mint(sa, tx_hash, public_key):
+    bitcoin_address = P2wpkhAddress(public_key).to_string()
+    logging.info(f"Minting for {bitcoin_address} with hash {tx_hash}")
+    if mint_batcher is not None:
+        return await asyncio.wrap_future(
+            mint_batcher.add((tx_hash, bitcoin_address))
+        )
 
-        nodes_info = NodesInfo()
-        sa = SA(nodes_info, default_timeout=50)
-        dkg_party = mpc_dkg_key["party"]
+    msg, mint_data = await get_mint_data(tx_hash, bitcoin_address)
+    data = {"method": "mint", "data": {**mint_data, "hash": msg}}
+    sig = await request_signature(sa, eth_dkg_key, data)
+    logging.info(f"Minting siganture is: {sig}")
+    return sig
+
+
+async def process_mint_batch(sa, mints):
+    # The deposits are authorized by one signature over the Merkle root of
+    # their mint messages, every user gets the root signature, the leaf and
+    # its inclusion proof.
+    logging.info(f"Minting {len(mints)} deposits in one signing round")
+    mint_datas = await asyncio.gather(
+        *[
+            get_mint_data(tx_hash, bitcoin_address)
+            for tx_hash, bitcoin_address in mints
+        ]
+    )
+    leaves = [mint_leaf(HexBytes(msg)) for msg, _ in mint_datas]
+    tree = MerkleTree(leaves)
+    root = "0x" + tree.root.hex()
+
+    data = {
+        "method": "mint_batch",
+        "data": {"mints": [mint_data for _, mint_data in mint_datas], "hash": root},
+    }
+    sig = await request_signature(sa, eth_dkg_key, data)
+    logging.info(f"Mint batch signature for root {root} is: {sig}")
+    return [
+        {
+            "signature": sig,
+            "root": root,
+            "leaf": "0x" + leaf.hex(),
+            "proof": ["0x" + node.hex() for node in tree.proof(index)],
+            "mint": mint_data,
+        }
+        for index, (leaf, (_, mint_data)) in enumerate(zip(leaves, mint_datas))
+    ]
 
-        send_amount = to_satoshis(amount)
 
-        utxos = get_utxos(mpc_address, FEE_AMOUNT + send_amount)
+async def process_send(sa, to_address, amount):
+    logging.info(f"Sending to {to_address}")
+    send_amount = to_satoshis(amount)
+
+    reservation = await asyncio.to_thread(utxo_index.reserve, FEE_AMOUNT + send_amount)
+    with reservation:
+        utxos = reservation.utxos
         logging.debug(f"UTxOs {utxos}")
 
         tx, tx_digests = get_simple_withdraw_tx(
             mpc_address, utxos, to_address, send_amount, FEE_AMOUNT
         )
 
-        for tx_digest in tx_digests:
-            nonces_dict = get_nonces(dkg_party, "BTC", tx_digest.hex())
-
-            data = {
-                "method": "get_simple_withdraw_tx",
-                "data": {
-                    "from": mpc_address,
-                    "fee": FEE_AMOUNT,
-                    "utxos": utxos,
-                    "send_amount": send_amount,
-                    "to": to_address,
-                    "hash": tx_digest.hex(),
-                },
-            }
-
-            group_sign = asyncio.run(
-                sa.request_signature(mpc_dkg_key, nonces_dict, data, dkg_party)
-            )
-            assert (
-                group_sign["result"] == "SUCCESSFUL"
-            ), f"Signature failed: Signature status: {group_sign['result']}"
-            sig = bytes_from_int(
-                int(group_sign["public_nonce"]["x"], 16)
-            ) + bytes_from_int(group_sign["signature"])
-            tx.witnesses.append(TxWitnessInput([sig.hex()]))
+        data = {
+            "method": "get_simple_withdraw_tx",
+            "data": {
+                "from": mpc_address,
+                "fee": FEE_AMOUNT,
+                "utxos": utxos,
+                "send_amount": send_amount,
+                "to": to_address,
+            },
+        }
+        tx.witnesses += await sign_tx_digests(sa, data, tx_digests)
 
         logging.info(f"tx witnesses: {tx.witnesses}")
 
         raw_tx = tx.serialize()
         logging.info(f"Raw tx: {raw_tx}")
-        resp = broadcast_tx(raw_tx)
+        resp = await asyncio.to_thread(broadcast_tx, raw_tx)
+        assert resp.ok, f"Broadcast failed: {resp.text}"
+        reservation.spend(tx)
         logging.info(
             f"Transaction Info: {json.dumps({'raw_tx': raw_tx, 'tx_hash': resp.text}, indent=4)}"
         )
-        return jsonify({"tx_hash": resp.text})
-    except Exception as e:
-        logging.error(f"Error in burn process: {str(e)}", exc_info=True)
-        return jsonify({"status": "error", "message": str(e)}), 500
+    return {"tx_hash": resp.text}
 
 
-@app.route("/burn", methods=["POST"])
-def burn():
-    try:
-        # Extracting fee and tx_hash from the request body
-        data = request.json
-        tx_hash = data["tx_hash"]
-        logging.info(f"Burning for hash {tx_hash}")
-
-        nodes_info = NodesInfo()
-        sa = SA(nodes_info, default_timeout=50)
-        dkg_party = mpc_dkg_key["party"]
-
-        burned = get_burned(tx_hash, web3, ZBTC_ADDRESS)
-        logging.debug(f"Burn Info: {burned}")
-        send_amount = burned["amount"]
-        single_spend_txid = burned["singleSpendTx"]
-        single_spend_vout = 0
-        to_address = burned["bitcoinAddress"]
-        to_address = PublicKey(to_address)
-        to_address = to_address.get_segwit_address().to_string()
-        burner_address = burned["burner"]
-
-        utxos = get_utxos(mpc_address, FEE_AMOUNT + send_amount)
+async def process_burn(sa, tx_hash, burned=None):
+    # A burn is withdrawn once, retries get the broadcast tx hash
+    return await signature_results.run(
+        f"burn:{tx_hash.lower()}", lambda: sign_burn(sa, tx_hash, burned)
+    )
+
+
+async def sign_burn(sa, tx_hash, burned=None):
+    logging.info(f"Burning for hash {tx_hash}")
+
+    # Burns from the indexer arrive already decoded
+    if burned is None:
+        burned = await asyncio.to_thread(get_burned, tx_hash)
+    logging.debug(f"Burn Info: {burned}")
+    if withdrawal_batcher is not None:
+        return await asyncio.wrap_future(withdrawal_batcher.add((tx_hash, burned)))
+
+    send_amount = burned["amount"]
+    single_spend_txid = burned["singleSpendTx"]
+    single_spend_vout = 0
+    to_address = burned["bitcoinAddress"]
+    to_address = PublicKey(to_address)
+    to_address = to_address.get_segwit_address().to_string()
+    burner_address = burned["burner"]
+
+    reservation = await asyncio.to_thread(utxo_index.reserve, FEE_AMOUNT + send_amount)
+    with reservation:
+        utxos = reservation.utxos
         logging.debug(f"UTxOs {utxos}")
 
-        tx, tx_digests = get_withdraw_tx(
+        tx, tx_digests = await asyncio.to_thread(
+            get_withdraw_tx,
             mpc_address,
             utxos,
             to_address,
@@ -245,43 +560,268 @@ def burn():
             burner_address,
         )
 
-        for tx_digest in tx_digests:
-            nonces_dict = get_nonces(dkg_party, "BTC", tx_digest.hex())
-
-            data = {
-                "method": "get_withdraw_tx",
-                "data": {
-                    "utxos": utxos,
-                    "burn_tx_hash": tx_hash,
-                    "hash": tx_digest.hex(),
-                    "fee": FEE_AMOUNT,
-                },
-            }
-
-            group_sign = asyncio.run(
-                sa.request_signature(mpc_dkg_key, nonces_dict, data, dkg_party)
-            )
-            assert (
-                group_sign["result"] == "SUCCESSFUL"
-            ), f"Signature failed: Signature status: {group_sign['result']}"
-            sig = bytes_from_int(
-                int(group_sign["public_nonce"]["x"], 16)
-            ) + bytes_from_int(group_sign["signature"])
-            tx.witnesses.append(TxWitnessInput([sig.hex()]))
+        data = {
+            "method": "get_withdraw_tx",
+            "data": {
+                "utxos": utxos,
+                "burn_tx_hash": tx_hash,
+                "fee": FEE_AMOUNT,
+            },
+        }
+        tx.witnesses += await sign_tx_digests(sa, data, tx_digests)
 
         logging.info(f"tx: {tx}")
 
         raw_tx = tx.serialize()
-        resp = broadcast_tx(raw_tx)
+        resp = await asyncio.to_thread(broadcast_tx, raw_tx)
+        assert resp.ok, f"Broadcast failed: {resp.text}"
+        reservation.spend(tx)
         logging.info(
             f"Transaction Info: {json.dumps({'raw_tx': raw_tx, 'tx_hash': resp.text}, indent=4)}"
         )
-        return jsonify({"tx_hash": resp.text})
+    return {"tx_hash": resp.text}
+
+
+async def process_burn_batch(sa, burns):
+    logging.info(f"Withdrawing {len(burns)} burns in one transaction")
+    burn_tx_hashes = [tx_hash for tx_hash, _ in burns]
+    burneds = [burned for _, burned in burns]
+    fee = FEE_AMOUNT + (len(burns) - 1) * WITHDRAW_BATCH_EXTRA_FEE
+    send_amount = sum(burned["amount"] for burned in burneds)
+
+    reservation = await asyncio.to_thread(utxo_index.reserve, fee + send_amount)
+    with reservation:
+        utxos = reservation.utxos
+        logging.debug(f"UTxOs {utxos}")
+
+        tx, tx_digests = await asyncio.to_thread(
+            get_batch_withdraw_tx, mpc_address, utxos, burneds, fee
+        )
+
+        data = {
+            "method": "get_batch_withdraw_tx",
+            "data": {
+                "utxos": utxos,
+                "burn_tx_hashes": burn_tx_hashes,
+                "fee": fee,
+            },
+        }
+        tx.witnesses += await sign_tx_digests(sa, data, tx_digests)
+
+        raw_tx = tx.serialize()
+        resp = await asyncio.to_thread(broadcast_tx, raw_tx)
+        assert resp.ok, f"Broadcast failed: {resp.text}"
+        reservation.spend(tx)
+        logging.info(
+            f"Transaction Info: {json.dumps({'raw_tx': raw_tx, 'tx_hash': resp.text, 'burns': burn_tx_hashes}, indent=4)}"
+        )
+    return {"tx_hash": resp.text}
+
+
+async def process_consolidation(sa, reservation):
+    utxos = reservation.utxos
+    tx, tx_digests = await asyncio.to_thread(get_consolidation_tx, mpc_address, utxos)
+
+    data = {"method": "get_consolidation_tx", "data": {"utxos": utxos}}
+    tx.witnesses += await sign_tx_digests(sa, data, tx_digests)
+
+    raw_tx = tx.serialize()
+    resp = await asyncio.to_thread(broadcast_tx, raw_tx)
+    assert resp.ok, f"Broadcast failed: {resp.text}"
+    reservation.spend(tx)
+    logging.info(
+        f"Consolidation Info: {json.dumps({'inputs': len(utxos), 'tx_hash': resp.text}, indent=4)}"
+    )
+    return {"tx_hash": resp.text}
+
+
+def is_idle():
+    # No withdrawal holds coins and none is waiting for a worker
+    return utxo_index.reservation_count() == 0 and jobs.depth() == 0
+
+
+async def run_burn_job(tx_hash, burned=None):
+    if withdrawal_batcher is not None:
+        return await defer_burn_job(tx_hash, burned)
+    result = await process_burn(aggregator, tx_hash, burned)
+    if burn_indexer is not None:
+        burn_indexer.mark_processed(tx_hash)
+    return result
+
+
+async def defer_burn_job(tx_hash, burned=None):
+    # The burn waits for its batch without holding a job worker, so batches
+    # can fill up to WITHDRAW_BATCH_MAX whatever the number of workers
+    key = f"burn:{tx_hash.lower()}"
+    if burned is None and signature_results.get(key) is None:
+        burned = await asyncio.to_thread(get_burned, tx_hash)
+    logging.info(f"Burning for hash {tx_hash}")
+    future = signature_results.submit(
+        key, lambda: withdrawal_batcher.add((tx_hash, burned))
+    )
+
+    def mark_processed(done):
+        if burn_indexer is not None and done.exception() is None:
+            burn_indexer.mark_processed(tx_hash)
+
+    future.add_done_callback(mark_processed)
+    return future
+
+
+async def run_send_job(to, amount):
+    return await process_send(aggregator, to, amount)
+
+
+def submit_burn_job(tx_hash, burned=None):
+    return jobs.submit(
+        "burn", {"tx_hash": tx_hash, "burned": burned}, key=f"burn:{tx_hash.lower()}"
+    )
+
+
+def process_withdrawal_queue():
+    # Indexed burns are run by the job workers like submitted ones
+    while True:
+        withdrawal = burn_indexer.withdrawal_queue.get()
+        while True:
+            try:
+                submit_burn_job(withdrawal["tx_hash"], withdrawal["burned"])
+                break
+            except JobQueueFull:
+                time.sleep(1)
+
+
+def collect_metrics():
+    return {
+        "nonce_pool": nonce_pool.metrics(),
+        "node_stats": node_stats.metrics(),
+        "node_health": node_health.metrics(),
+        "burn_indexer": burn_indexer.metrics() if burn_indexer else None,
+        "deposit_watcher": deposit_watcher.metrics() if deposit_watcher else None,
+        "signature_results": signature_results.metrics(),
+        "jobs": jobs.metrics(),
+        "utxo_index": utxo_index.metrics(),
+        "consolidation": (
+            consolidation_scheduler.metrics() if consolidation_scheduler else None
+        ),
+        "withdrawal_batcher": (
+            withdrawal_batcher.metrics() if withdrawal_batcher else None
+        ),
+        "mint_batcher": mint_batcher.metrics() if mint_batcher else None,
+        "admission": {
+            endpoint: limit.metrics() for endpoint, limit in admission.items()
+        },
+        "tx_cache": tx_cache.stats(),
+        "withdraw_deposit_flags": withdraw_deposit_flags.stats(),
+        "receipt_cache": evm_client.receipts.stats(),
+    }
+
+
+def retry_later(e, status):
+    return (
+        jsonify({"status": "error", "message": str(e)}),
+        status,
+        {"Retry-After": str(ADMISSION_RETRY_AFTER)},
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify(collect_metrics())
+
+
+@app.route("/mint", methods=["POST"])
+def mint():
+    try:
+        # Extracting fee and tx_hash and public_key_hex from the request body
+        data = request.json
+        with admission["mint"].admit():
+            sig = asyncio.run(
+                process_mint(aggregator, data["tx_hash"], data["public_key"])
+            )
+        return jsonify(sig)
+    except (AdmissionRejected, NoncePoolExhausted) as e:
+        return retry_later(e, 429)
+    except NodesUnavailable as e:
+        return retry_later(e, 503)
+    except Exception as e:
+        logging.error(f"Error in mint process: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/send", methods=["POST"])
+def send():
+    try:
+        # Extracting fee and tx_hash from the request body
+        data = request.json
+        with admission["send"].admit():
+            result = asyncio.run(
+                process_send(aggregator, data["to"], data["amount"])
+            )
+        return jsonify(result)
+    except (AdmissionRejected, NoncePoolExhausted) as e:
+        return retry_later(e, 429)
+    except NodesUnavailable as e:
+        return retry_later(e, 503)
+    except Exception as e:
+        logging.error(f"Error in send process: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/burn", methods=["POST"])
+def burn():
+    try:
+        # Extracting fee and tx_hash from the request body
+        data = request.json
+        with admission["burn"].admit():
+            result = asyncio.run(process_burn(aggregator, data["tx_hash"]))
+        return jsonify(result)
+    except (AdmissionRejected, NoncePoolExhausted) as e:
+        return retry_later(e, 429)
+    except NodesUnavailable as e:
+        return retry_later(e, 503)
     except Exception as e:
         logging.error(f"Error in burn process: {str(e)}", exc_info=True)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route("/jobs/burn", methods=["POST"])
+def submit_burn():
+    try:
+        data = request.json
+        return jsonify({"job_id": submit_burn_job(data["tx_hash"])}), 202
+    except JobQueueFull as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error in burn job submission: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/jobs/send", methods=["POST"])
+def submit_send():
+    try:
+        data = request.json
+        job_id = jobs.submit("send", {"to": data["to"], "amount": data["amount"]})
+        return jsonify({"job_id": job_id}), 202
+    except JobQueueFull as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error in send job submission: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    # ?wait=<seconds> blocks until the job finished or the wait ran out
+    try:
+        wait = min(float(request.args.get("wait", 0)), JOB_WAIT_MAX)
+    except ValueError:
+        return jsonify({"status": "error", "message": "wait must be a number"}), 400
+    job = jobs.wait(job_id, wait) if wait > 0 else jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    return jsonify(job)
+
+
 if __name__ == "__main__":
     # Initialize logging
     file_path = "logs"
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import sys
+
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from quart import Quart, request, jsonify
+
+import sa as signature_aggregator
+from admission import AdmissionRejected
+from config import ADMISSION_RETRY_AFTER, JOB_WAIT_MAX
+from jobs import JobQueueFull
+from node_health import NodesUnavailable
+from nonce_pool import NoncePoolExhausted
+
+app = Quart(__name__)
+
+
+def retry_later(e, status):
+    return (
+        jsonify({"status": "error", "message": str(e)}),
+        status,
+        {"Retry-After": str(ADMISSION_RETRY_AFTER)},
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    return jsonify(signature_aggregator.collect_metrics())
+
+
+@app.route("/mint", methods=["POST"])
+async def mint():
+    try:
+        data = await request.get_json()
+        async with signature_aggregator.admission["mint"].admit_async():
+            sig = await signature_aggregator.process_mint(
+                signature_aggregator.aggregator, data["tx_hash"], data["public_key"]
+            )
+        return jsonify(sig)
+    except (AdmissionRejected, NoncePoolExhausted) as e:
+        return retry_later(e, 429)
+    except NodesUnavailable as e:
+        return retry_later(e, 503)
+    except Exception as e:
+        logging.error(f"Error in mint process: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/send", methods=["POST"])
+async def send():
+    try:
+        data = await request.get_json()
+        async with signature_aggregator.admission["send"].admit_async():
+            result = await signature_aggregator.process_send(
+                signature_aggregator.aggregator, data["to"], data["amount"]
+            )
+        return jsonify(result)
+    except (AdmissionRejected, NoncePoolExhausted) as e:
+        return retry_later(e, 429)
+    except NodesUnavailable as e:
+        return retry_later(e, 503)
+    except Exception as e:
+        logging.error(f"Error in send process: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/burn", methods=["POST"])
+async def burn():
+    try:
+        data = await request.get_json()
+        async with signature_aggregator.admission["burn"].admit_async():
+            result = await signature_aggregator.process_burn(
+                signature_aggregator.aggregator, data["tx_hash"]
+            )
+        return jsonify(result)
+    except (AdmissionRejected, NoncePoolExhausted) as e:
+        return retry_later(e, 429)
+    except NodesUnavailable as e:
+        return retry_later(e, 503)
+    except Exception as e:
+        logging.error(f"Error in burn process: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/jobs/burn", methods=["POST"])
+async def submit_burn():
+    try:
+        data = await request.get_json()
+        job_id = signature_aggregator.submit_burn_job(data["tx_hash"])
+        return jsonify({"job_id": job_id}), 202
+    except JobQueueFull as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error in burn job submission: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/jobs/send", methods=["POST"])
+async def submit_send():
+    try:
+        data = await request.get_json()
+        job_id = signature_aggregator.jobs.submit(
+            "send", {"to": data["to"], "amount": data["amount"]}
+        )
+        return jsonify({"job_id": job_id}), 202
+    except JobQueueFull as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error in send job submission: {str(e)}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+async def get_job(job_id):
+    jobs = signature_aggregator.jobs
+    try:
+        wait = min(float(request.args.get("wait", 0)), JOB_WAIT_MAX)
+    except ValueError:
+        return jsonify({"status": "error", "message": "wait must be a number"}), 400
+    if wait > 0:
+        job = await jobs.wait_async(job_id, wait)
+    else:
+        job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    return jsonify(job)
+
+
+async def run_sa(total_node_number: int) -> None:
+    await signature_aggregator.initialization(total_node_number)
+    logging.info("Initialization has been completed.")
+
+    config = Config()
+    config.bind = ["0.0.0.0:8000"]
+    await serve(app, config)
+
+
+if __name__ == "__main__":
+    # Initialize logging
+    file_path = "logs"
+    file_name = "test.log"
+    log_formatter = logging.Formatter(
+        "%(asctime)s - %(message)s",
+    )
+    root_logger = logging.getLogger()
+    if not os.path.exists(file_path):
+        os.mkdir(file_path)
+    with open(f"{file_path}/{file_name}", "w"):
+        pass
+    file_handler = logging.FileHandler(f"{file_path}/{file_name}")
+    file_handler.setFormatter(log_formatter)
+    root_logger.addHandler(file_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(log_formatter)
+    root_logger.addHandler(console_handler)
+    root_logger.setLevel(logging.DEBUG)
+
+    sys.set_int_max_str_digits(0)
+    total_node_number = int(sys.argv[1])
+    try:
+        asyncio.run(run_sa(total_node_number))
+    except KeyboardInterrupt:
+        pass
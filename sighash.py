@@ -0,0 +1,79 @@
+import hashlib
+import struct
+from typing import List
+
+from bitcoinutils.constants import SIGHASH_ALL, TAPROOT_SIGHASH_ALL
+from bitcoinutils.script import Script
+from bitcoinutils.transactions import Transaction
+from bitcoinutils.utils import encode_varint, h_to_b
+
+TAP_SIGHASH_TAG = hashlib.sha256(b"TapSighash").digest()
+
+
+def _le32(value) -> bytes:
+    # bitcoinutils keeps version, locktime and sequence as raw bytes
+    return value if isinstance(value, bytes) else struct.pack("<I", value)
+
+
+def _serialize_script_pubkey(script: Script) -> bytes:
+    script_bytes = script.to_bytes()
+    return encode_varint(len(script_bytes)) + script_bytes
+
+
+def taproot_key_path_digests(
+    tx: Transaction,
+    script_pubkeys: List[Script],
+    amounts: List[int],
+    sighash: int = TAPROOT_SIGHASH_ALL,
+) -> List[bytes]:
+    # BIP341 signature messages of all inputs share everything except the
+    # input index, so the shared hashes are computed once and the tagged hash
+    # state over that common prefix is copied for every input. This makes the
+    # whole transaction O(n) instead of O(n^2) with one digest per call.
+    if sighash not in (TAPROOT_SIGHASH_ALL, SIGHASH_ALL):
+        return [
+            tx.get_transaction_taproot_digest(
+                i, script_pubkeys, amounts, 0, sighash=sighash
+            )
+            for i in range(len(tx.inputs))
+        ]
+
+    sha_prevouts = hashlib.sha256(
+        b"".join(
+            h_to_b(txin.txid)[::-1] + struct.pack("<I", txin.txout_index)
+            for txin in tx.inputs
+        )
+    ).digest()
+    sha_amounts = hashlib.sha256(
+        b"".join(amount.to_bytes(8, "little") for amount in amounts)
+    ).digest()
+    sha_script_pubkeys = hashlib.sha256(
+        b"".join(_serialize_script_pubkey(script) for script in script_pubkeys)
+    ).digest()
+    sha_sequences = hashlib.sha256(
+        b"".join(_le32(txin.sequence) for txin in tx.inputs)
+    ).digest()
+    sha_outputs = hashlib.sha256(
+        b"".join(txout.to_bytes() for txout in tx.outputs)
+    ).digest()
+
+    midstate = hashlib.sha256(TAP_SIGHASH_TAG + TAP_SIGHASH_TAG)
+    midstate.update(
+        bytes([0, sighash])
+        + _le32(tx.version)
+        + _le32(tx.locktime)
+        + sha_prevouts
+        + sha_amounts
+        + sha_script_pubkeys
+        + sha_sequences
+        + sha_outputs
+        # spend type: key path, no annex
+        + bytes([0])
+    )
+
+    digests = []
+    for i in range(len(tx.inputs)):
+        digest = midstate.copy()
+        digest.update(struct.pack("<I", i))
+        digests.append(digest.digest())
+    return digests
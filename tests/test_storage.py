@@ -0,0 +1,50 @@
+import json
+
+from utils.storage import AppendOnlyStore
+
+RECORDS = [
+    ["s", "a", 1],
+    ["s", "b", {"nonce": [1, 2]}],
+    ["d", "a", None],
+    ["s", "c", "x"],
+    ["d", "b", None],
+]
+
+
+def expected_state(complete_records):
+    state = {}
+    for op, key, value in complete_records:
+        if op == "s":
+            state[key] = value
+        else:
+            state.pop(key, None)
+    return state
+
+
+def test_replay_log_cut_at_every_offset(tmp_path):
+    lines = [(json.dumps(record) + "\n").encode() for record in RECORDS]
+    log = b"".join(lines)
+    for offset in range(len(log) + 1):
+        path = tmp_path / f"store-{offset}.log"
+        path.write_bytes(log[:offset])
+        complete = 0
+        end = 0
+        for line in lines:
+            if end + len(line) > offset:
+                break
+            end += len(line)
+            complete += 1
+
+        store = AppendOnlyStore(str(path), fsync=False)
+        assert dict(store.items()) == expected_state(RECORDS[:complete])
+        # The torn tail is gone, so records appended after the crash survive
+        assert path.stat().st_size == end
+        store.set("after", offset)
+        store.close()
+
+        reopened = AppendOnlyStore(str(path), fsync=False)
+        assert dict(reopened.items()) == {
+            **expected_state(RECORDS[:complete]),
+            "after": offset,
+        }
+        reopened.close()
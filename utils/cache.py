@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    # Thread-safe LRU map where every entry may carry its own time to live
+    def __init__(self, maxsize: int = 1024, ttl: float = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def get_or_set(self, key, factory, ttl: float = -1):
+        # Concurrent misses on the same key wait for a single factory call
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                with self._lock:
+                    value = self._lookup(key)
+                    if value is not None:
+                        self.hits += 1
+                        return value
+                    self.misses += 1
+                value = factory()
+                self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is key_lock:
+                    del self._inflight[key]
+
+    def set(self, key, value, ttl: float = -1) -> None:
+        # ttl=-1 uses the cache default, ttl=None never expires
+        ttl = self.ttl if ttl == -1 else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+
+class KeyValueStore:
+    def get(self, key, default=None):
+        raise NotImplementedError()
+
+    def set(self, key, value) -> None:
+        raise NotImplementedError()
+
+    def update(self, items: dict) -> None:
+        for key, value in items.items():
+            self.set(key, value)
+
+    def remove(self, key) -> None:
+        raise NotImplementedError()
+
+    def remove_many(self, keys) -> None:
+        for key in keys:
+            self.remove(key)
+
+    def items(self):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def close(self) -> None:
+        pass
+
+
+class AppendOnlyStore(KeyValueStore):
+    # Every mutation is appended to the log as one JSON line and fsynced, the
+    # live values are kept in an in-memory dict. Once the log holds too many
+    # overwritten or deleted records it is rewritten next to the original and
+    # atomically swapped in.
+    def __init__(
+        self,
+        file_path: str,
+        fsync: bool = True,
+        compaction_ratio: float = 2.0,
+        compaction_min_records: int = 1024,
+    ) -> None:
+        self.file_path = file_path
+        self.fsync = fsync
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_records = compaction_min_records
+        self._lock = threading.Lock()
+        self._data = {}
+        self._records = 0
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+        self._file = open(self.file_path, "a", encoding="utf-8")
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.file_path):
+            return
+        valid_offset = 0
+        with open(self.file_path, "rb") as file:
+            for line in file:
+                try:
+                    # A record is complete with its newline; a last line
+                    # without one is torn even if it parses, as the next
+                    # append would be written onto the same line
+                    if not line.endswith(b"\n"):
+                        raise ValueError("missing newline")
+                    op, key, value = json.loads(line)
+                except ValueError:
+                    # A torn write from a crash can only be the last record.
+                    logging.warning(
+                        f"Truncating corrupted tail of {self.file_path} at {valid_offset}"
+                    )
+                    break
+                if op == "s":
+                    self._data[key] = value
+                else:
+                    self._data.pop(key, None)
+                self._records += 1
+                valid_offset += len(line)
+        if valid_offset != os.path.getsize(self.file_path):
+            with open(self.file_path, "r+b") as file:
+                file.truncate(valid_offset)
+
+    def _append(self, records) -> None:
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._records += len(records)
+        if (
+            self._records >= self.compaction_min_records
+            and self._records > self.compaction_ratio * max(len(self._data), 1)
+        ):
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for key, value in self._data.items():
+                file.write(json.dumps(["s", key, value]) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.file_path)
+        self._file = open(self.file_path, "a", encoding="utf-8")
+        self._records = len(self._data)
+        logging.debug(f"Compacted {self.file_path} to {self._records} records")
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._append([["s", key, value]])
+
+    def update(self, items: dict) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._data.update(items)
+            self._append([["s", key, value] for key, value in items.items()])
+
+    def remove(self, key) -> None:
+        with self._lock:
+            if key not in self._data:
+                return
+            del self._data[key]
+            self._append([["d", key, None]])
+
+    def remove_many(self, keys) -> None:
+        with self._lock:
+            keys = [key for key in keys if self._data.pop(key, None) is not None]
+            if keys:
+                self._append([["d", key, None] for key in keys])
+
+    def items(self):
+        return list(self._data.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class SqliteStore(KeyValueStore):
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def set(self, key, value) -> None:
+        self.update({key: value})
+
+    def update(self, items: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in items.items()],
+            )
+
+    def remove(self, key) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def remove_many(self, keys) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM kv WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def items(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM kv").fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+STORE_BACKENDS = {
+    "log": (AppendOnlyStore, ".log"),
+    "sqlite": (SqliteStore, ".db"),
+}
+
+
+def migrate_json(store: KeyValueStore, json_path: str) -> None:
+    if not os.path.exists(json_path):
+        return
+    if len(store) == 0:
+        with open(json_path, "r") as file:
+            data = json.load(file)
+        store.update(data)
+        logging.info(f"Migrated {len(data)} records from {json_path}")
+    os.replace(json_path, f"{json_path}.migrated")
+
+
+def open_store(json_path: str, backend: str = "log") -> KeyValueStore:
+    store_class, extension = STORE_BACKENDS[backend]
+    store = store_class(os.path.splitext(json_path)[0] + extension)
+    migrate_json(store, json_path)
+    return store
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, List
+
+from bitcoinutils.keys import P2trAddress
+from bitcoinutils.transactions import Transaction
+
+from chain_client import MempoolClient
+from coin_selection import InsufficientFunds, select_coins
+from config import UTXO_INDEX_REFRESH_INTERVAL, UTXO_RESERVATION_TTL
+
+
+def outpoint(txid: str, vout: int) -> str:
+    return f"{txid}:{vout}"
+
+
+class Reservation:
+    # Coins selected for one withdrawal. Used as a context manager that
+    # releases the reservation on exit; coins of a transaction recorded with
+    # spend() stay unavailable as they are marked spent in the index.
+    def __init__(self, index, reservation_id: str, utxos: List[Dict]) -> None:
+        self.index = index
+        self.id = reservation_id
+        self.utxos = utxos
+
+    def spend(self, tx: Transaction) -> None:
+        self.index.apply_transaction(tx)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.index.release(self.id)
+        return False
+
+
+class UtxoIndex:
+    # Local view of the spendable coins of one address. It is refreshed from
+    # mempool.space in the background and updated right away with our own
+    # broadcasts, so selection needs no round trip. Coins handed out to an
+    # in-flight withdrawal are reserved until it is broadcast or fails, so
+    # concurrent withdrawals never pick the same coins.
+    def __init__(
+        self,
+        client: MempoolClient,
+        address: str,
+        classify,
+        refresh_interval: float = UTXO_INDEX_REFRESH_INTERVAL,
+        reservation_ttl: float = UTXO_RESERVATION_TTL,
+    ) -> None:
+        self.client = client
+        self.address = address
+        self.script_pubkey = P2trAddress(address).to_script_pub_key().to_hex()
+        # classify(txids) -> {txid: True if the coin is a withdraw deposit}
+        self.classify = classify
+        self.refresh_interval = refresh_interval
+        self.reservation_ttl = reservation_ttl
+        self._lock = threading.Lock()
+        self._utxos = {}
+        # Coins spent or created by our broadcasts that the API may not show
+        # yet, with the time they were recorded
+        self._spent = {}
+        self._created = {}
+        self._reservations = {}
+        self._stop_event = threading.Event()
+        self.refreshes = 0
+
+    def refresh(self) -> None:
+        utxos = self.client.get_address_utxos(self.address)
+        flags = self.classify([utxo["txid"] for utxo in utxos])
+        now = time.monotonic()
+        with self._lock:
+            listed = {}
+            for utxo in utxos:
+                if flags[utxo["txid"]]:
+                    continue
+                listed[outpoint(utxo["txid"], utxo["vout"])] = utxo
+            # Local changes are dropped once the API agrees or they expired
+            self._spent = {
+                key: at
+                for key, at in self._spent.items()
+                if key in listed and now - at < self.reservation_ttl
+            }
+            self._created = {
+                key: entry
+                for key, entry in self._created.items()
+                if key not in listed and now - entry[1] < self.reservation_ttl
+            }
+            self._utxos = listed
+            self.refreshes += 1
+
+    def _available(self) -> List[Dict]:
+        now = time.monotonic()
+        for reservation_id, (_, expires_at) in list(self._reservations.items()):
+            if expires_at <= now:
+                logging.warning(f"UTXO reservation {reservation_id} expired")
+                del self._reservations[reservation_id]
+        reserved = {key for keys, _ in self._reservations.values() for key in keys}
+        utxos = list(self._utxos.items()) + [
+            (key, utxo) for key, (utxo, _) in self._created.items()
+        ]
+        return [
+            utxo
+            for key, utxo in utxos
+            if key not in reserved and key not in self._spent
+        ]
+
+    def reserve_coins(self, select) -> Reservation:
+        # select(available utxos) -> the utxos to reserve
+        with self._lock:
+            selected = select(self._available())
+            reservation_id = uuid.uuid4().hex
+            self._reservations[reservation_id] = (
+                {outpoint(utxo["txid"], utxo["vout"]) for utxo in selected},
+                time.monotonic() + self.reservation_ttl,
+            )
+        return Reservation(self, reservation_id, selected)
+
+    def _try_reserve(self, amount: int) -> Reservation:
+        def select(utxos):
+            try:
+                return select_coins(utxos, amount)
+            except InsufficientFunds as e:
+                raise InsufficientFunds(f"{self.address}: {e}")
+
+        return self.reserve_coins(select)
+
+    def reserve(self, amount: int) -> Reservation:
+        try:
+            return self._try_reserve(amount)
+        except InsufficientFunds:
+            # Coins may have arrived since the last refresh
+            self.refresh()
+            return self._try_reserve(amount)
+
+    def reservation_count(self) -> int:
+        with self._lock:
+            return len(self._reservations)
+
+    def release(self, reservation_id: str) -> None:
+        with self._lock:
+            self._reservations.pop(reservation_id, None)
+
+    def apply_transaction(self, tx: Transaction) -> None:
+        now = time.monotonic()
+        txid = tx.get_txid()
+        with self._lock:
+            for txin in tx.inputs:
+                key = outpoint(txin.txid, txin.txout_index)
+                self._spent[key] = now
+                self._created.pop(key, None)
+            for vout, txout in enumerate(tx.outputs):
+                if (
+                    txout.amount == 0
+                    or txout.script_pubkey.to_hex() != self.script_pubkey
+                ):
+                    continue
+                utxo = {
+                    "txid": txid,
+                    "vout": vout,
+                    "value": txout.amount,
+                    "status": {"confirmed": False},
+                }
+                self._created[outpoint(txid, vout)] = (utxo, now)
+
+    def _refresh_periodically(self) -> None:
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"UTXO index refresh failed: {e}")
+
+    def start_refresh_thread(self) -> None:
+        self._refresh_thread = threading.Thread(target=self._refresh_periodically)
+        self._refresh_thread.daemon = True
+        self._refresh_thread.start()
+
+    def metrics(self):
+        with self._lock:
+            available = self._available()
+            return {
+                "utxos": len(self._utxos) + len(self._created),
+                "available": len(available),
+                "available_value": sum(utxo["value"] for utxo in available),
+                "reservations": len(self._reservations),
+                "pending_spends": len(self._spent),
+                "refreshes": self.refreshes,
+            }
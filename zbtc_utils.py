@@ -1,8 +1,6 @@
-import json
 import secrets
 import string
 
-import requests
 from bitcoinutils.keys import P2trAddress, P2wpkhAddress, PublicKey, PrivateKey
 from bitcoinutils.transactions import Transaction, TxInput, TxOutput, TxWitnessInput
 from bitcoinutils.script import Script
@@ -11,43 +9,27 @@ from bitcoinutils.constants import TAPROOT_SIGHASH_ALL
 
 import pyfrost.frost as frost
 from pyfrost.crypto_utils import code_to_pub
-from config import BASE_URL, BTC_NETWORK, DepositType
+from chain_client import mempool_client
+from evm_client import evm_client
+from coin_selection import InsufficientFunds, select_coins
+from sighash import taproot_key_path_digests
+from config import (
+    BTC_NETWORK,
+    CONSOLIDATION_FEE_BASE,
+    CONSOLIDATION_FEE_PER_INPUT,
+    DUST_LIMIT,
+    TX_CACHE_SIZE,
+    DepositType,
+)
+from utils.cache import LRUCache
 
 setup(BTC_NETWORK)
 
+withdraw_deposit_flags = LRUCache(TX_CACHE_SIZE)
 
-def get_burned(tx_hash, web3, contract_address):
-    contract_abi = json.loads("""[
-        {
-            "anonymous": false,
-            "inputs": [
-                {"indexed": true, "internalType": "address", "name": "burner", "type": "address"},
-                {"indexed": false, "internalType": "uint256", "name": "amount", "type": "uint256"},
-                {"indexed": false, "internalType": "bytes", "name": "bitcoinAddress", "type": "bytes"},
-                {"indexed": false, "internalType": "uint256", "name": "singleSpendTx", "type": "uint256"}
-            ],
-            "name": "Burned",
-            "type": "event"
-        }
-    ]""")
-    contract = web3.eth.contract(address=contract_address, abi=contract_abi)
-    receipt = web3.eth.get_transaction_receipt(tx_hash)
-
-    # Iterate over logs and decode the Burned event
-    for log in receipt["logs"]:
-        if log["address"].lower() == contract_address.lower():
-            try:
-                decoded_log = contract.events.Burned().process_log(log)
-                return {
-                    "burner": decoded_log["args"]["burner"],
-                    "amount": decoded_log["args"]["amount"],
-                    "bitcoinAddress": decoded_log["args"]["bitcoinAddress"].hex(),
-                    "singleSpendTx": hex(decoded_log["args"]["singleSpendTx"])[2:],
-                }
-            except Exception:
-                continue
-
-    return None
+
+def get_burned(tx_hash):
+    return evm_client.get_burned(tx_hash)
 
 
 def get_taproot_address(public_key):
@@ -70,6 +52,13 @@ def get_nonces(party):
     return nonces
 
 
+def add_change_output(txouts, change_amount, change_address):
+    # Change below the dust limit would not relay and is left to the fee
+    assert change_amount >= 0, f"Inputs are {-change_amount} sats short"
+    if change_amount >= DUST_LIMIT:
+        txouts.append(TxOutput(change_amount, change_address.to_script_pub_key()))
+
+
 def get_withdraw_tx(
     from_address,
     utxos,
@@ -102,19 +91,54 @@ def get_withdraw_tx(
 
     first_amount = sum(amounts)
 
-    txout1 = TxOutput(send_amount, to_address.to_script_pub_key())
-    txout2 = TxOutput(first_amount - send_amount - fee_amount, from_address.to_script_pub_key())
+    txouts = [TxOutput(send_amount, to_address.to_script_pub_key())]
+    add_change_output(txouts, first_amount - send_amount - fee_amount, from_address)
 
     first_script_pubkey = from_address.to_script_pub_key()
     utxos_script_pubkeys = [first_script_pubkey] * len(txins)
 
-    tx = Transaction(txins, [txout1, txout2], has_segwit=True)
-    tx_digests = [
-        tx.get_transaction_taproot_digest(
-            i, utxos_script_pubkeys, amounts, 0, sighash=TAPROOT_SIGHASH_ALL
+    tx = Transaction(txins, txouts, has_segwit=True)
+    tx_digests = taproot_key_path_digests(
+        tx, utxos_script_pubkeys, amounts, sighash=TAPROOT_SIGHASH_ALL
+    )
+    return tx, tx_digests
+
+
+def get_batch_withdraw_tx(from_address, utxos, burns, fee_amount):
+    # One transaction serves several burns: every burn adds its single-spend
+    # input and a recipient output, and the fee is split between recipients.
+    fee_share = fee_amount // len(burns)
+    from_address = P2trAddress(from_address)
+
+    txins = [TxInput(utxo["txid"], utxo["vout"]) for utxo in utxos]
+    amounts = [utxo["value"] for utxo in utxos]
+    txouts = []
+    total_sent = 0
+    for burned in burns:
+        to_address = PublicKey(burned["bitcoinAddress"]).get_segwit_address()
+        single_spend_tx = get_deposit(
+            burned["singleSpendTx"],
+            to_address.to_string(),
+            from_address.to_string(),
+            DepositType.WITHDRAW,
         )
-        for i in range(len(txins))
-    ]
+        assert (
+            int(single_spend_tx["eth_address"], 16) == int(burned["burner"], 16)
+        ), f"{burned['burner']} initiates burn transaction, and the address on withdraw is {single_spend_tx['eth_address']}"
+
+        txins.append(TxInput(burned["singleSpendTx"], 0))
+        amounts.append(single_spend_tx["amount"])
+        send_amount = burned["amount"] + single_spend_tx["amount"] - fee_share
+        txouts.append(TxOutput(send_amount, to_address.to_script_pub_key()))
+        total_sent += send_amount
+
+    add_change_output(txouts, sum(amounts) - total_sent - fee_amount, from_address)
+
+    utxos_script_pubkeys = [from_address.to_script_pub_key()] * len(txins)
+    tx = Transaction(txins, txouts, has_segwit=True)
+    tx_digests = taproot_key_path_digests(
+        tx, utxos_script_pubkeys, amounts, sighash=TAPROOT_SIGHASH_ALL
+    )
     return tx, tx_digests
 
 
@@ -129,51 +153,71 @@ def get_simple_withdraw_tx(from_address, utxos, to_address, send_amount, fee_amo
 
     first_amount = sum(amounts)
 
-    txout1 = TxOutput(send_amount, to_address.to_script_pub_key())
-    txout2 = TxOutput(
-        first_amount - send_amount - fee_amount, from_address.to_script_pub_key()
+    txouts = [TxOutput(send_amount, to_address.to_script_pub_key())]
+    add_change_output(txouts, first_amount - send_amount - fee_amount, from_address)
+
+    tx = Transaction(txins, txouts, has_segwit=True)
+    tx_digests = taproot_key_path_digests(
+        tx, utxos_script_pubkeys, amounts, sighash=TAPROOT_SIGHASH_ALL
     )
+    return tx, tx_digests
 
-    tx = Transaction(txins, [txout1, txout2], has_segwit=True)
-    tx_digests = [
-        tx.get_transaction_taproot_digest(
-            i, utxos_script_pubkeys, amounts, 0, sighash=TAPROOT_SIGHASH_ALL
-        )
-        for i in range(len(utxos))
-    ]
+
+def consolidation_fee(input_count):
+    return CONSOLIDATION_FEE_BASE + CONSOLIDATION_FEE_PER_INPUT * input_count
+
+
+def get_consolidation_tx(from_address, utxos):
+    # Merges coins of the wallet into one output back to the wallet
+    from_address = P2trAddress(from_address)
+    script_pubkey = from_address.to_script_pub_key()
+
+    txins = [TxInput(utxo["txid"], utxo["vout"]) for utxo in utxos]
+    amounts = [utxo["value"] for utxo in utxos]
+    consolidated = sum(amounts) - consolidation_fee(len(utxos))
+    assert consolidated >= DUST_LIMIT, "Consolidated coins do not cover the fee"
+
+    tx = Transaction(txins, [TxOutput(consolidated, script_pubkey)], has_segwit=True)
+    tx_digests = taproot_key_path_digests(
+        tx, [script_pubkey] * len(txins), amounts, sighash=TAPROOT_SIGHASH_ALL
+    )
     return tx, tx_digests
 
 
+def is_deposit_for_withdraw(tx):
+    op_pushnum = f"OP_PUSHNUM_{DepositType.WITHDRAW.value}"
+    return any(
+        [
+            out["scriptpubkey_type"] == "op_return"
+            and op_pushnum in out["scriptpubkey_asm"]
+            for out in tx["vout"]
+        ]
+    )
+
+
+def classify_withdraw_deposits(txids):
+    # The outputs are committed to by the txid, so the classification of a
+    # transaction never changes and is looked up only once.
+    flags = {txid: withdraw_deposit_flags.get(txid) for txid in txids}
+    unknown = [txid for txid, flag in flags.items() if flag is None]
+    for tx in mempool_client.get_txs(unknown):
+        flags[tx["txid"]] = is_deposit_for_withdraw(tx)
+        withdraw_deposit_flags.set(tx["txid"], flags[tx["txid"]])
+    return flags
+
+
 def get_utxos(bitcoin_address, desired_amount):
-    url = f"{BASE_URL}/address/{bitcoin_address}/utxo"
-    response = requests.get(url)
-    utxos = response.json()
-    total_value = 0
-    selected_utxos = []
-    for utxo in utxos:
-        url = f"{BASE_URL}/tx/{utxo['txid']}"
-        tx = requests.get(url).json()
-        op_pushnum = f"OP_PUSHNUM_{DepositType.WITHDRAW.value}"
-        is_deposit_for_withdraw = any(
-            [
-                out["scriptpubkey_type"] == "op_return"
-                and op_pushnum in out["scriptpubkey_asm"]
-                for out in tx["vout"]
-            ]
-        )
-        if is_deposit_for_withdraw:
-            continue
-        if total_value >= desired_amount:
-            break
-        selected_utxos.append(utxo)
-        total_value += utxo["value"]
-    return selected_utxos
+    utxos = mempool_client.get_address_utxos(bitcoin_address)
+    flags = classify_withdraw_deposits([utxo["txid"] for utxo in utxos])
+    spendable = [utxo for utxo in utxos if not flags[utxo["txid"]]]
+    try:
+        return select_coins(spendable, desired_amount)
+    except InsufficientFunds:
+        return spendable
 
 
 def get_deposit(tx_hash: str, bitcoin_address: str, mpc_wallet: str, type: DepositType):
-    url = f"{BASE_URL}/tx/{tx_hash}"
-    print(url)
-    tx = requests.get(url).json()
+    tx = mempool_client.get_tx(tx_hash)
     op_pushnum = f"OP_PUSHNUM_{type.value}"
     assert tx["status"]["confirmed"], "tx does not have enough confirmations"
     outputs = tx["vout"]
@@ -258,6 +302,4 @@ def deposit_to_zex(
 
 
 def broadcast_tx(raw_tx: str):
-    url = f"{BASE_URL}/tx"
-    response = requests.post(url, data=raw_tx, headers={"Content-Type": "text/plain"})
-    return response
+    return mempool_client.broadcast_tx(raw_tx)